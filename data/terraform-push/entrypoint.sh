@@ -6,7 +6,7 @@ if ! test -f $HOME/.terraform.d/credentials.tfrc.json; then
   exit 1
 fi
 
-sed -i -e "s/{replace_me}/$ORG/g" main.tf
+sed -i -e "s/{replace_me}/$ORG/g" -e "s/{replace_me_workspace}/${WORKSPACE:-SMK}/g" main.tf
 
 terraform init
 terraform apply --auto-approve
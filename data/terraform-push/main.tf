@@ -3,7 +3,7 @@ terraform {
     organization = "{replace_me}"
 
     workspaces {
-      name = "SMK"
+      name = "{replace_me_workspace}"
     }
   }
 }
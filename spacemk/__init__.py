@@ -10,6 +10,8 @@ from benedict import benedict
 from packaging.version import Version as PyPIVersion
 from semver import Version as SemVerVersion
 
+from spacemk.record import json_default
+
 
 def pypi_version_to_semver(version: str) -> str:
     pypi_version = PyPIVersion(version)
@@ -69,8 +71,8 @@ def is_command_available(command: str | list[str], execute: bool = False) -> boo
     return which(command) is not None
 
 
-def load_normalized_data() -> dict:
-    path = Path(get_tmp_folder(), "data.json")
+def load_normalized_data(path: str = "data.json") -> dict:
+    path = Path(get_tmp_folder(), path)
     with path.open("r", encoding="utf-8") as fp:
         return benedict(json.load(fp))
 
@@ -78,4 +80,4 @@ def load_normalized_data() -> dict:
 def save_normalized_data(data: dict, path: str = "data.json") -> None:
     path = Path(get_tmp_folder(), path)
     with path.open("w", encoding="utf-8") as fp:
-        json.dump(data, fp, indent=2, sort_keys=True)
+        json.dump(data, fp, default=json_default, indent=2, sort_keys=True)
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any
+
+from spacemk import ensure_folder_exists
+
+
+class ResponseCache:
+    """On-disk cache for API responses
+
+    Entries expire after their time to live, and the oldest entries are evicted when the cache grows over its maximum
+    size. The ETag and Last-Modified response headers are stored alongside the response body so that entries can be
+    revalidated with conditional requests.
+    """
+
+    def __init__(self, path: Path, ttl: int, max_size: int):
+        """Constructor
+
+        Args:
+            path (Path): Folder to store the cache entries in
+            ttl (int): Time to live of the cache entries, in seconds
+            max_size (int): Maximum size of the cache, in bytes
+        """
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self._path = path
+        self._ttl = ttl
+
+        ensure_folder_exists(self._path)
+        self._size = sum(entry_path.stat().st_size for entry_path in self._path.glob("*.json"))
+
+    def _evict(self) -> None:
+        if self._size <= self._max_size:
+            return
+
+        logging.debug(f"Evicting response cache entries ({self._size} bytes used, {self._max_size} bytes allowed)")
+
+        for entry_path in sorted(self._path.glob("*.json"), key=lambda entry_path: entry_path.stat().st_mtime):
+            self._size -= entry_path.stat().st_size
+            entry_path.unlink(missing_ok=True)
+
+            if self._size <= self._max_size:
+                break
+
+    def _get_entry_path(self, key: str) -> Path:
+        return Path(self._path, f"{hashlib.sha256(key.encode()).hexdigest()}.json")
+
+    def delete(self, key: str) -> None:
+        """Delete a cache entry
+
+        Args:
+            key (str): Cache key
+        """
+        entry_path = self._get_entry_path(key)
+
+        with self._lock:
+            if entry_path.exists():
+                self._size -= entry_path.stat().st_size
+                entry_path.unlink(missing_ok=True)
+
+    def get(self, key: str) -> dict | None:
+        """Retrieve a cache entry
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            dict | None: Cache entry with the "body", "etag", "last_modified" and "stored_at" keys, or None if there
+                is no entry for the key or if it expired
+        """
+        entry_path = self._get_entry_path(key)
+
+        try:
+            with entry_path.open("r", encoding="utf-8") as fp:
+                entry = json.load(fp)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if time.time() - entry.get("stored_at", 0) > self._ttl:
+            self.delete(key)
+            return None
+
+        return entry
+
+    def set(self, key: str, body: str, etag: str | None = None, last_modified: str | None = None) -> None:
+        """Store a cache entry
+
+        Args:
+            key (str): Cache key
+            body (str): Response body
+            etag (str | None): Value of the ETag response header
+            last_modified (str | None): Value of the Last-Modified response header
+        """
+        entry_path = self._get_entry_path(key)
+        content = json.dumps({"body": body, "etag": etag, "last_modified": last_modified, "stored_at": time.time()})
+
+        with self._lock:
+            if entry_path.exists():
+                self._size -= entry_path.stat().st_size
+
+            # Write to a temporary file first so that concurrent readers never see a partial entry
+            tmp_path = entry_path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_text(content, encoding="utf-8")
+            tmp_path.replace(entry_path)
+
+            self._size += entry_path.stat().st_size
+            self._evict()
+
+
+class RequestMemo:
+    """In-memory memo for the responses of the requests made during a run
+
+    Concurrent calls for the same key are coalesced into a single request, and responses are then memoized until
+    they are invalidated. The least recently used responses are evicted when the memo grows over its maximum size.
+    Failures are shared with the concurrent calls, but never memoized.
+    """
+
+    def __init__(self, max_size: int):
+        """Constructor
+
+        Args:
+            max_size (int): Maximum size of the memoized responses, in characters of their strings (e.g. bodies). Set
+                to 0 to only coalesce calls.
+        """
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self._size = 0
+
+    def _claim(self, key: str) -> tuple[Future, bool]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                future = Future()
+                future.set_result(self._entries[key])
+
+                return future, False
+
+            if key in self._in_flight:
+                return self._in_flight[key], False
+
+            future = Future()
+            self._in_flight[key] = future
+
+            return future, True
+
+    def _get_size(self, value: Any) -> int:
+        if isinstance(value, str):
+            return len(value)
+
+        if isinstance(value, tuple):
+            return sum(self._get_size(item) for item in value)
+
+        return 0
+
+    def _settle(self, key: str, future: Future, value: Any = None, exception: BaseException | None = None) -> None:
+        with self._lock:
+            # Calls that were in flight when their key was invalidated are not memoized, as they may be stale
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+                if exception is None:
+                    self._store(key, value)
+
+        if exception is None:
+            future.set_result(value)
+        else:
+            future.set_exception(exception)
+
+    def _store(self, key: str, value: Any) -> None:
+        # A maximum size of 0 disables memoization, including for empty responses
+        if self._max_size <= 0:
+            return
+
+        size = self._get_size(value)
+        if size > self._max_size:
+            return
+
+        self._entries[key] = value
+        self._size += size
+
+        while self._size > self._max_size:
+            _, evicted_value = self._entries.popitem(last=False)
+            self._size -= self._get_size(evicted_value)
+
+    def call(self, key: str, func: Callable[[], Any]) -> Any:
+        """Return the memoized response for a key, or wait for the call in flight, or make the call
+
+        Args:
+            key (str): Key identifying the request (e.g. its URL)
+            func (Callable[[], Any]): Function making the request
+
+        Returns:
+            Any: Response
+        """
+        future, owner = self._claim(key)
+        if not owner:
+            return future.result()
+
+        try:
+            value = func()
+        except BaseException as e:
+            self._settle(key, future, exception=e)
+            raise
+
+        self._settle(key, future, value=value)
+
+        return value
+
+    def invalidate(self, is_stale: Callable[[str], bool]) -> None:
+        """Forget the memoized responses, and the calls in flight, that may be stale
+
+        Args:
+            is_stale (Callable[[str], bool]): Function returning True for the keys to invalidate
+        """
+        with self._lock:
+            for key in [key for key in self._entries if is_stale(key)]:
+                value = self._entries.pop(key)
+                self._size -= self._get_size(value)
+
+            for key in [key for key in self._in_flight if is_stale(key)]:
+                del self._in_flight[key]
@@ -0,0 +1,95 @@
+import json
+import logging
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Any
+
+from spacemk import get_tmp_subfolder
+from spacemk.record import json_default
+
+
+class Checkpoint:
+    """Persist intermediate results to disk so that a long-running process can be resumed after a failure
+
+    Each key is stored in its own JSON file, so that values can be saved concurrently from several threads.
+    """
+
+    def __init__(self, name: str):
+        """Constructor
+
+        Args:
+            name (str): Checkpoint name (e.g. the name of the command using it)
+        """
+        self._name = name
+        self._path = get_tmp_subfolder(f"checkpoints/{name}")
+
+    def _get_key_path(self, key: str) -> Path:
+        return Path(self._path, f"{re.sub(r'[^A-Za-z0-9_.-]', '_', key)}.json")
+
+    def clear(self) -> None:
+        """Delete all the saved values"""
+        logging.debug(f"Clearing the '{self._name}' checkpoint")
+
+        shutil.rmtree(self._path, ignore_errors=True)
+        self._path = get_tmp_subfolder(f"checkpoints/{self._name}")
+
+    def delete(self, key: str) -> None:
+        """Delete a saved value
+
+        Args:
+            key (str): Key
+        """
+        self._get_key_path(key).unlink(missing_ok=True)
+
+    def find(self, prefix: str) -> dict[str, Any]:
+        """Retrieve the saved values whose key starts with a prefix
+
+        Args:
+            prefix (str): Key prefix (e.g. "enrich/backups/")
+
+        Returns:
+            dict[str, Any]: Saved values, with the rest of their key as the keys
+        """
+        file_prefix = self._get_key_path(prefix).stem
+
+        values = {}
+        for path in sorted(Path(self._path).glob(f"{file_prefix}*.json")):
+            with path.open("r", encoding="utf-8") as fp:
+                values[path.stem.removeprefix(file_prefix)] = json.load(fp)
+
+        return values
+
+    def get(self, key: str) -> Any | None:
+        """Retrieve a saved value
+
+        Args:
+            key (str): Key
+
+        Returns:
+            Any | None: Saved value, or None if there is no value for the key
+        """
+        path = self._get_key_path(key)
+        if not path.exists():
+            return None
+
+        logging.debug(f"Loading '{key}' from the '{self._name}' checkpoint")
+
+        with path.open("r", encoding="utf-8") as fp:
+            return json.load(fp)
+
+    def set(self, key: str, value: Any) -> None:
+        """Save a value
+
+        Args:
+            key (str): Key
+            value (Any): JSON-serializable value, which may contain records
+        """
+        path = self._get_key_path(key)
+
+        # Write to a temporary file first so that a crash never leaves a partial value behind
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as fp:
+            json.dump(value, fp, default=json_default)
+        tmp_path.replace(path)
@@ -11,7 +11,19 @@ from spacemk.exporters import load_exporter
     help_headers_color="yellow",
     help_options_color="green",
 )
+@click.option(
+    "--quick",
+    default=False,
+    help="Only count the entities, using the API pagination metadata, instead of extracting them.",
+    is_flag=True,
+)
+@click.option(
+    "--sample",
+    default=0,
+    help="With --quick, also run the checks on a sample of this many entities per organization.",
+    type=click.IntRange(min=0),
+)
 @pass_meta_key("config")
-def audit(config):
+def audit(config, quick, sample):
     exporter = load_exporter(config=config.get("exporter", {}))
-    exporter.audit()
+    exporter.audit(quick=quick, sample=sample)
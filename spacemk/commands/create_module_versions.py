@@ -9,7 +9,9 @@ from spacemk import load_normalized_data
 from spacemk.spacelift import Spacelift
 
 
-def _get_repository_tags(endpoint: str, github_api_token: str, namespace: str, repository: str) -> dict:
+def _get_repository_tags(
+    endpoint: str, github_api_token: str, namespace: str, repository: str, timeout: tuple[float, float]
+) -> dict:
     data = {}
 
     headers = {
@@ -19,11 +21,13 @@ def _get_repository_tags(endpoint: str, github_api_token: str, namespace: str, r
 
     try:
         url = f"{endpoint}/repos/{namespace}/{repository}/tags?per_page=100"
-        response = requests.get(headers=headers, url=url)
+        response = requests.get(headers=headers, timeout=timeout, url=url)
         logging.debug(request_dump.dump_all(response).decode("utf-8"))
         response.raise_for_status()
     except requests.exceptions.HTTPError as e:
         raise RuntimeError(f"HTTP Error: {e}") from e
+    except requests.exceptions.Timeout as e:
+        raise RuntimeError(f"Timeout Error: {e}") from e
 
     for tag in response.json():
         tag_name = tag.get("name").removeprefix("v")
@@ -57,6 +61,7 @@ def create_module_versions(config):
             github_api_token=config.get("github.api_token"),
             namespace=module.get("vcs.namespace"),
             repository=module.get("vcs.repository"),
+            timeout=(config.get("github.connect_timeout", 10), config.get("github.read_timeout", 60)),
         )
 
         for tag, commit_sha in tags.items():
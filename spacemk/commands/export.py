@@ -11,7 +11,20 @@ from spacemk.exporters import load_exporter
     help_headers_color="yellow",
     help_options_color="green",
 )
+@click.option(
+    "--incremental",
+    default=False,
+    help="Only refetch the entities that changed since the previous export. Changes to workspace variables alone "
+    "do not update their workspace, so they are not picked up.",
+    is_flag=True,
+)
+@click.option(
+    "--resume",
+    default=False,
+    help="Resume the export from the checkpoints saved by a previous export that did not complete.",
+    is_flag=True,
+)
 @pass_meta_key("config")
-def export(config):
+def export(config, incremental, resume):
     exporter = load_exporter(config=config.get("exporter", {}))
-    exporter.export()
+    exporter.export(incremental=incremental, resume=resume)
@@ -0,0 +1,67 @@
+import threading
+
+from benedict import benedict
+
+
+class EntityIndex:
+    """Index of the entities held in a data dict (e.g. {"workspaces": [...]}) by ID, for each entity type
+
+    The index of an entity type is built on its first lookup, and rebuilt when the list of entities of that type is
+    replaced or changes length (e.g. when entities are filtered out). Call invalidate() after changing entity IDs or
+    replacing entities in place.
+    """
+
+    def __init__(self, data: dict):
+        """Constructor
+
+        Args:
+            data (dict): Dictionary with entity types as the keys and lists of entities as the values
+        """
+        self.data = data
+        self._indexes = {}
+
+        # Looking up a list in a benedict casts all its items, so changes are detected on the underlying dict
+        self._raw_data = data.dict() if isinstance(data, benedict) else data
+        self._lock = threading.Lock()
+
+    def _get_index(self, entity_type: str, id_keypath: str) -> dict:
+        raw_entities = self._raw_data.get(entity_type) or []
+
+        index = self._indexes.get((entity_type, id_keypath))
+        if index is None or index[0] is not raw_entities or index[1] != len(raw_entities):
+            with self._lock:
+                # Keep the first entity for duplicate IDs, as a linear search would
+                entities_by_id = {}
+                for entity in self.data.get(entity_type) or []:
+                    entities_by_id.setdefault(entity.get(id_keypath), entity)
+
+                index = (raw_entities, len(raw_entities), entities_by_id)
+                self._indexes[(entity_type, id_keypath)] = index
+
+        return index[2]
+
+    def get(self, entity_type: str, id_: str, id_keypath: str = "id") -> dict | None:
+        """Retrieve an entity
+
+        Args:
+            entity_type (str): Entity type (e.g. "workspaces")
+            id_ (str): Entity ID
+            id_keypath (str): Keypath of the entity ID (e.g. "_source_id" for Spacelift entities)
+
+        Returns:
+            dict | None: Entity, or None if there is no entity with this ID
+        """
+        return self._get_index(entity_type, id_keypath).get(id_)
+
+    def invalidate(self, entity_type: str | None = None) -> None:
+        """Rebuild the index of an entity type on its next lookup
+
+        Args:
+            entity_type (str | None): Entity type. All the entity types are invalidated if not set.
+        """
+        with self._lock:
+            if entity_type is None:
+                self._indexes.clear()
+            else:
+                for key in [key for key in self._indexes if key[0] == entity_type]:
+                    del self._indexes[key]
@@ -1,15 +1,50 @@
 import functools
+import json
 import logging
 import re
+import threading
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from functools import reduce
 from itertools import filterfalse
 from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode
 
 import click
+import requests
 import xlsxwriter
+from benedict import benedict
+from requests.adapters import HTTPAdapter, Retry
 
-from spacemk import get_tmp_folder, save_normalized_data
+from spacemk import get_tmp_folder, load_normalized_data, save_normalized_data
+from spacemk.cache import RequestMemo
+from spacemk.checkpoint import Checkpoint
+from spacemk.entity_index import EntityIndex
+from spacemk.pagination import Paginator
+from spacemk.record import Record
+
+
+def consumes(*entity_types: str, stage: str) -> Callable:
+    """Declare the source provider entity types a pipeline stage method needs
+
+    Exports only extract the entity types consumed by the enrichment and mapping stages, as long as every method
+    declaring them in a parent class still declares them once overridden.
+
+    Args:
+        *entity_types (str): Entity types (e.g. "workspaces")
+        stage (str): Pipeline stage ("check", "enrich" or "map")
+
+    Returns:
+        Callable: Decorator
+    """
+
+    def decorator(func: Callable) -> Callable:
+        func.consumes = (stage, frozenset(entity_types))
+        return func
+
+    return decorator
 
 
 class BaseExporter(ABC):
@@ -19,7 +54,24 @@ class BaseExporter(ABC):
         Args:
             config (dict): Exporter configuration
         """
+        self._checkpoint = None
         self._config = config
+        self._entity_index = None
+        self._entity_index_lock = threading.Lock()
+        self._entity_types = None
+        self._previous_data = None
+        self._sample_size = None
+
+        # HTTP toolkit shared with custom exporters (see custom/README.md)
+        self.api_timeout = (
+            self._config.get("api_connect_timeout", 10),
+            self._config.get("api_read_timeout", 60),
+        )
+        self._session = None
+        self._session_lock = threading.Lock()
+
+        # Identical GET requests are only sent once per run, until a mutating request makes their response stale
+        self._request_memo = RequestMemo(max_size=self._config.get("api_memo_size_mb", 64) * 1024 * 1024)
 
     def _check_data(self, data: dict) -> dict:
         """Check source provider data and add warnings as needed
@@ -41,6 +93,94 @@ class BaseExporter(ABC):
         """
         logging.info("No requirement checks defined. Skipping.")
 
+    def _count_data(self) -> dict | None:
+        """Count the source provider entities without extracting them
+
+        Returns:
+            dict | None: Number of entities for each entity type, or None if counting is not supported
+        """
+        return None
+
+    def _create_session(self, pool_size: int | None = None, max_retries: int | None = None) -> requests.Session:
+        """Create the HTTP session shared by the calls to the source provider API
+
+        Connections are pooled and kept alive, and idempotent requests are retried with an exponential backoff on
+        connection errors, rate limiting (honoring the Retry-After header) and server errors. Exporters can override
+        this method to add authentication headers.
+
+        Args:
+            pool_size (int | None): Maximum number of pooled connections. Defaults to the api_pool_size setting.
+            max_retries (int | None): Maximum number of retries. Defaults to the api_max_retries setting.
+
+        Returns:
+            requests.Session: HTTP session
+        """
+        if pool_size is None:
+            pool_size = self._config.get("api_pool_size", 10)
+        if max_retries is None:
+            max_retries = self._config.get("api_max_retries", 5)
+
+        logging.debug(f"Creating HTTP session with a pool of {pool_size} connections")
+
+        retry = Retry(
+            backoff_factor=0.5,
+            raise_on_status=False,
+            status_forcelist=[429, 500, 502, 503, 504],
+            total=max_retries,
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        return session
+
+    def _delete_checkpoint(self, key: str) -> None:
+        """Delete a saved value once it is no longer needed to resume the current action
+
+        Args:
+            key (str): Checkpoint key
+        """
+        if self._checkpoint is not None:
+            self._checkpoint.delete(key)
+
+    def _get_consumed_entity_types(self, stages: list[str]) -> set | None:
+        """Collect the entity types consumed by pipeline stages
+
+        Args:
+            stages (list[str]): Pipeline stages
+
+        Returns:
+            set | None: Entity types, or None if they cannot be determined, in which case all of them are needed
+        """
+        names = {
+            name for class_ in type(self).__mro__ for name, value in vars(class_).items() if hasattr(value, "consumes")
+        }
+
+        entity_types = set()
+        for name in sorted(names):
+            method = getattr(self, name)
+            if not hasattr(method, "consumes"):
+                logging.debug(f"'{name}' does not declare the entity types it consumes. Extracting all of them.")
+                return None
+
+            stage, method_entity_types = method.consumes
+            if stage in stages:
+                entity_types.update(method_entity_types)
+
+        return entity_types
+
+    def _display_counts(self, counts: dict) -> None:
+        """Display entity counts in the terminal
+
+        Args:
+            counts (dict): Number of entities for each entity type
+        """
+        for entity_type, count in sorted(counts.items()):
+            title = entity_type.replace("_", " ").title()
+            self._print(f"{title}: {'unknown' if count is None else count}")
+
     def _display_report(self, data: dict) -> None:
         """Display data report in the terminal
 
@@ -77,6 +217,9 @@ class BaseExporter(ABC):
     def _extract_data(self) -> dict:
         """Extract raw data from the source provider
 
+        When exporting, extractors may skip the entity types that are not listed in self._entity_types, unless it
+        is None.
+
         Returns:
             dict: Dictionary with entity types as the keys and lists of entities as the values
         """
@@ -114,6 +257,134 @@ class BaseExporter(ABC):
 
         return data
 
+    def _get_entity(self, data: dict, entity_type: str, id_: str, id_keypath: str = "id") -> dict | None:
+        """Find an entity by ID
+
+        Lookups go through an index of the data, which is built lazily and reused by the following lookups in the
+        same data.
+
+        Args:
+            data (dict): Dictionary with entity types as the keys and lists of entities as the values
+            entity_type (str): Entity type (e.g. "workspaces")
+            id_ (str): Entity ID
+            id_keypath (str): Keypath of the entity ID (e.g. "_source_id" for Spacelift entities)
+
+        Returns:
+            dict | None: Entity, or None if there is no entity with this ID
+        """
+        with self._entity_index_lock:
+            if self._entity_index is None or self._entity_index.data is not data:
+                self._entity_index = EntityIndex(data)
+            entity_index = self._entity_index
+
+        return entity_index.get(entity_type, id_, id_keypath=id_keypath)
+
+    def _get_json(self, url: str, query: dict | list | None = None, memoize: bool = True) -> tuple[dict, dict]:
+        """Send a GET request to the source provider API and parse the JSON response
+
+        Concurrent identical requests are coalesced, and responses are memoized until invalidated with
+        _invalidate_memoized_responses.
+
+        Args:
+            url (str): URL
+            query (dict | list | None): Query parameters
+            memoize (bool): Whether the response can be served from, and stored in, the memo
+
+        Returns:
+            tuple[dict, dict]: Response payload and response headers
+        """
+        if query:
+            url = f"{url}{'&' if '?' in url else '?'}{urlencode(query)}"
+
+        def send() -> tuple[str, dict]:
+            try:
+                response = self._get_session().get(timeout=self.api_timeout, url=url)
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                raise RuntimeError(f"Error for {url}: {e}") from e
+
+            return response.text, dict(response.headers)
+
+        body, headers = self._request_memo.call(url, send) if memoize else send()
+
+        return benedict(json.loads(body)), headers
+
+    def _get_session(self) -> requests.Session:
+        """Return the HTTP session shared by all the calls to the source provider API
+
+        The session is created on first use and reused afterwards, including from worker threads, so that
+        connections are kept alive and the TCP/TLS handshakes are only paid once per pooled connection.
+
+        Returns:
+            requests.Session: Shared HTTP session
+        """
+        with self._session_lock:
+            if self._session is None:
+                self._session = self._create_session()
+
+        return self._session
+
+    def _invalidate_memoized_responses(self, url: str) -> None:
+        """Forget the memoized responses that a mutating request may have made stale
+
+        By default, every memoized response whose URL starts with the URL of the mutating request is forgotten.
+
+        Args:
+            url (str): URL of the mutating request
+        """
+        self._request_memo.invalidate(lambda memoized_url: memoized_url.startswith(url))
+
+    def _iter_api_pages(self, url: str, paginator: Paginator, query: dict | list | None = None) -> Iterator[dict]:
+        """Pull the pages of a collection from the source provider API
+
+        Args:
+            url (str): Collection URL
+            paginator (Paginator): Pagination strategy (e.g. spacemk.pagination.LinkPaginator)
+            query (dict | list | None): Query parameters
+
+        Pages are not memoized, so that only the page being processed is held in memory.
+
+        Yields:
+            dict: Response payloads, in page order
+        """
+        if query:
+            url = f"{url}{'&' if '?' in url else '?'}{urlencode(query)}"
+
+        page_url = paginator.get_first_url(url)
+        while page_url:
+            payload, headers = self._get_json(page_url, memoize=False)
+            yield payload
+
+            page_url = paginator.get_next_url(page_url, payload, headers)
+
+    def _load_checkpoint(self, key: str) -> Any | None:
+        """Load a value saved by a previous run of the current action, if it is resumable
+
+        Args:
+            key (str): Checkpoint key
+
+        Returns:
+            Any | None: Saved value, or None if there is none
+        """
+        if self._checkpoint is None:
+            return None
+
+        return self._checkpoint.get(key)
+
+    def _load_checkpoints(self, prefix: str) -> dict[str, Any]:
+        """Load the values saved by a previous run of the current action under a key prefix
+
+        Args:
+            prefix (str): Checkpoint key prefix
+
+        Returns:
+            dict[str, Any]: Saved values, with the rest of their key as the keys
+        """
+        if self._checkpoint is None:
+            return {}
+
+        return self._checkpoint.find(prefix)
+
     @abstractmethod
     def _map_data(self, data: dict) -> dict:
         """Map data from the source provider entity types to Spacelift equivalent entity types
@@ -126,6 +397,28 @@ class BaseExporter(ABC):
         """
         pass
 
+    def _map_concurrently(self, func: Callable, items: Iterable, max_workers: int | None = None) -> list:
+        """Apply a function to every item, using a bounded pool of threads if extraction workers are enabled
+
+        Args:
+            func (Callable): Function to apply to each item
+            items (Iterable): Items to process
+            max_workers (int | None): Maximum number of threads. Defaults to the extraction_workers setting.
+
+        Returns:
+            list: Results, in the same order as the items
+        """
+        items = list(items)
+        if max_workers is None:
+            max_workers = self._config.get("extraction_workers", 1)
+        max_workers = min(max_workers, len(items))
+
+        if max_workers <= 1:
+            return [func(item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(func, items))
+
     def _print(self, message: str) -> None:
         """Print message to the terminal
 
@@ -134,6 +427,25 @@ class BaseExporter(ABC):
         """
         click.echo(message)
 
+    def _restore_pending_changes(self) -> None:
+        """Revert the changes to the source provider left over by a previous export that did not complete
+
+        Called before starting an export from scratch, while the checkpoints of the previous export are still
+        available. Exporters that change the source provider must persist what is needed to revert those changes in
+        checkpoints, and override this method.
+        """
+        logging.info("No restoration of pending changes implemented. Skipping.")
+
+    def _save_checkpoint(self, key: str, value: Any) -> None:
+        """Save a value so that the current action can be resumed from this point, if it is resumable
+
+        Args:
+            key (str): Checkpoint key
+            value (Any): JSON-serializable value
+        """
+        if self._checkpoint is not None:
+            self._checkpoint.set(key, value)
+
     def _save_report_to_file(self, data: dict) -> None:
         """Save source provider data report to file
 
@@ -151,9 +463,11 @@ class BaseExporter(ABC):
 
             flatten_entity_type_data = []
             for entity_data in data.get(entity_type_name):
-                entity_data.keypath_separator = None
-                entity_data[["attributes", "tag-names"]] = None
-                flatten_entity_type_data.append(entity_data.flatten(separator="."))
+                # Records are converted so that their keys can be flattened like any other entity's
+                entity = benedict(entity_data.to_dict()) if isinstance(entity_data, Record) else entity_data
+                entity.keypath_separator = None
+                entity[["attributes", "tag-names"]] = None
+                flatten_entity_type_data.append(entity.flatten(separator="."))
 
             if len(flatten_entity_type_data) > 0:
                 pivoted_entity_type_data = {
@@ -175,32 +489,110 @@ class BaseExporter(ABC):
 
         logging.info("Stop saving default report to file")
 
-    def audit(self) -> None:
+    def audit(self, quick: bool = False, sample: int = 0) -> None:
         """Audit the source provider data
 
         A report is displayed in the terminal, and optionally, the extracted data can be saved to file.
+
+        Args:
+            quick (bool): Only count the entities, instead of extracting and checking them
+            sample (int): When running a quick audit, also check a sample of this many entities
         """
         logging.info("Start auditing data")
 
         self._check_requirements(action="audit")
-        data = self._extract_data()
-        data = self._filter_data(data)
-        data = self._check_data(data)
-        self._save_report_to_file(data)
-        self._display_report(data)
+
+        counts = self._count_data() if quick else None
+        if quick and counts is None:
+            logging.warning("Quick audits are not supported by this exporter. Running a full audit.")
+
+        if counts is None:
+            data = self._extract_data()
+            data = self._filter_data(data)
+            data = self._check_data(data)
+            self._save_report_to_file(data)
+            self._display_report(data)
+        else:
+            self._display_counts(counts)
+
+            if sample > 0:
+                self._print(f"\nChecks on a sample of up to {sample} entities per organization:")
+
+                # Only the entity types needed by the checks are extracted and reported on
+                entity_types = self._get_consumed_entity_types(stages=["check"])
+                self._entity_types = entity_types
+                self._sample_size = sample
+                try:
+                    data = self._extract_data()
+                finally:
+                    self._entity_types = None
+                    self._sample_size = None
+
+                data = self._filter_data(data)
+                data = self._check_data(data)
+                if entity_types is not None:
+                    data = {key: value for key, value in data.items() if key in entity_types}
+                self._display_report(data)
 
         logging.info("Stop auditing data")
 
-    def export(self) -> None:
-        """Export data from the source provider and map it to Spacelift entitty types"""
+    def export(self, resume: bool = False, incremental: bool = False) -> None:
+        """Export data from the source provider and map it to Spacelift entitty types
+
+        Args:
+            resume (bool): Resume from the checkpoints saved by a previous export that did not complete
+            incremental (bool): Reuse the source provider data saved by the previous export for the entities that
+                did not change since
+        """
         logging.info("Start exporting data")
 
+        if incremental:
+            if Path(get_tmp_folder(), "source_data.json").exists():
+                logging.info("Reusing the source provider data saved by the previous export")
+                self._previous_data = load_normalized_data("source_data.json")
+            else:
+                logging.warning("Could not find the source provider data saved by a previous export. Exporting all.")
+
+        self._checkpoint = Checkpoint(name="export")
+        if resume:
+            logging.info("Resuming the export from the last checkpoint")
+        else:
+            # The checkpoints are the only record of the changes to revert, so they are kept if reverting fails
+            self._restore_pending_changes()
+            self._checkpoint.clear()
+
         self._check_requirements(action="export")
-        data = self._extract_data()
+
+        # Only the entity types needed to enrich and map the data are extracted
+        self._entity_types = self._get_consumed_entity_types(stages=["enrich", "map"])
+
+        data = self._load_checkpoint("stages/extract")
+        if data is None:
+            data = self._extract_data()
+            self._save_checkpoint("stages/extract", data)
+        else:
+            data = benedict(data)
+
         data = self._filter_data(data)
-        data = self._enrich_data(data)
+
+        enriched_data = self._load_checkpoint("stages/enrich")
+        if enriched_data is None:
+            data = self._enrich_data(data)
+            self._save_checkpoint("stages/enrich", data)
+        else:
+            data = benedict(enriched_data)
+
+        # Saved before mapping so that the next incremental export can reuse it
+        save_normalized_data(data, "source_data.json")
+
         data = self._map_data(data)
         data["class"] = type(self).__name__
         save_normalized_data(data)
 
+        self._checkpoint.clear()
+        self._checkpoint = None
+        self._entity_index = None
+        self._entity_types = None
+        self._previous_data = None
+
         logging.info("Stop exporting data")
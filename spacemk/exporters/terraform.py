@@ -1,14 +1,22 @@
 # ruff: noqa: PERF401
+import functools
+import hashlib
 import json
 import logging
 import os
+import queue
+import random
 import re
 import tempfile
 import threading
 import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from http import HTTPStatus
 from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 import click
 import pydash
@@ -20,7 +28,83 @@ from requests_toolbelt.utils import dump as request_dump
 from slugify import slugify
 
 from spacemk import get_tmp_subfolder, is_command_available
+from spacemk.cache import ResponseCache
 from spacemk.exporters import BaseExporter
+from spacemk.exporters.base import consumes
+from spacemk.hedging import Hedger
+from spacemk.ratelimit import get_rate_limiter, parse_retry_after
+from spacemk.record import Record, json_default
+
+
+def parse_plan_env_vars(logs_data: str) -> dict:
+    """Parse the environment variables written to the plan output by the terraform-pre-plan agent hook
+
+    Only the output between the "SMK EXPORT" markers is parsed, if present. Variables are separated by NUL
+    characters (env -0), so that values can span several lines. Agent images that predate this use one variable
+    per line, in which case lines that do not start a new variable are appended to the previous value.
+
+    Args:
+        logs_data (str): Plan output
+
+    Returns:
+        dict: Environment variable values, indexed by name
+    """
+    start_marker = "<==================== SMK EXPORT ===================="
+    end_marker = "===================== SMK EXPORT ===================>"
+
+    start = logs_data.find(start_marker)
+    if start != -1:
+        logs_data = logs_data[start + len(start_marker) :].removeprefix("\n")
+
+        end = logs_data.rfind(end_marker)
+        if end != -1:
+            logs_data = logs_data[:end]
+
+    env_vars = {}
+    if "\0" in logs_data:
+        for entry in logs_data.split("\0"):
+            name, separator, value = entry.partition("=")
+            if separator and name.strip():
+                env_vars[name.strip()] = value
+    else:
+        name = None
+        for line in logs_data.removesuffix("\n").split("\n"):
+            match = re.match(r"([^=\s]+)=", line)
+            if match:
+                name = match.group(1)
+                env_vars[name] = line[match.end() :]
+            elif name is not None:
+                env_vars[name] = f"{env_vars[name]}\n{line}"
+
+    return env_vars
+
+
+def group_workspace_variables_with_invalid_name(data: dict) -> dict:
+    """Group the workspace variables whose name is not a valid environment variable name, in a single pass
+
+    Args:
+        data (dict): Source provider data, with workspaces and workspace variables
+
+    Returns:
+        dict: Variables, indexed by workspace ID and type ("plain" or "secret"). Variables with an unknown
+            sensitivity are in both groups.
+    """
+    prog = re.compile("^[a-zA-Z_]+[a-zA-Z0-9_]*$")
+    workspace_ids = {workspace.get("id") for workspace in data.get("workspaces")}
+    groups = {}
+
+    for variable in data.get("workspace_variables"):
+        workspace_id = variable.get("relationships.workspace.data.id")
+        if workspace_id not in workspace_ids or prog.search(variable.get("attributes.key")) is not None:
+            continue
+
+        sensitive = variable.get("attributes.sensitive")
+        if sensitive is not True:
+            groups.setdefault((workspace_id, "plain"), []).append(variable)
+        if sensitive is not False:
+            groups.setdefault((workspace_id, "secret"), []).append(variable)
+
+    return groups
 
 
 class TerraformExporterPlanError(Exception):
@@ -28,11 +112,23 @@ class TerraformExporterPlanError(Exception):
         message = f"Could not trigger a plan for the '{organization_id}/{workspace_id}' workspace"
         super().__init__(message)
 
+
+class TerraformExporterHTTPError(RuntimeError):
+    def __init__(self, error: requests.exceptions.HTTPError):
+        self.status_code = error.response.status_code
+        super().__init__(f"HTTP Error: {error}")
+
+
 class AgentStartError(Exception):
     def __init__(self):
         super().__init__("Failed to verify container has started")
 
 
+class TerraformExporterNoWorkspaceError(Exception):
+    def __init__(self, organization_id: str):
+        super().__init__(f"No temporary workspace left to enrich '{organization_id}' variable sets with")
+
+
 class TerraformExporter(BaseExporter):
     def __init__(self, config: dict):
         super().__init__(config)
@@ -55,6 +151,73 @@ class TerraformExporter(BaseExporter):
         if self.parallel_enrichment_workers > 1:
             logging.info(f"Parallel enrichment enabled with {self.parallel_enrichment_workers} workers")
 
+        self.extraction_workers = self._config.get("extraction_workers", 1)
+        if self.extraction_workers > 1:
+            logging.info(f"Concurrent extraction enabled with {self.extraction_workers} workers")
+
+        self.pagination_workers = self._config.get("pagination_workers", self.extraction_workers)
+
+        self.module_cache_ttl = self._config.get("module_cache_ttl", 0)
+
+        self.bulk_variable_extraction = self._config.get("bulk_variable_extraction", False)
+        # Organizations for which the Terraform API rejected listing all the workspace variables at once
+        self._bulk_variable_unsupported_organization_ids = set()
+
+        self.checkpoint_pages = self._config.get("checkpoint_pages", False)
+
+        self.api_page_size = self._config.get("api_page_size", 100)
+        self.sparse_fieldsets = self._config.get("sparse_fieldsets", True)
+
+        self._workspace_variable_properties = [
+            "attributes.category",
+            "attributes.description",
+            "attributes.hcl",
+            "attributes.key",
+            "attributes.sensitive",
+            "attributes.value",
+            "id",
+            "relationships.workspace.data.id",
+        ]
+
+        # Connections are pooled and kept alive across calls, so the pool must be at least as large as
+        # the number of threads that can talk to the API at the same time.
+        self.api_pool_size = self._config.get(
+            "api_pool_size", max(10, self.parallel_enrichment_workers, self.extraction_workers)
+        )
+
+        # Workspaces saved by the previous export, indexed by ID, when running an incremental export
+        self._previous_workspaces = None
+        self._previous_workspaces_lock = threading.Lock()
+
+        self._api_token_fingerprint = hashlib.sha256(str(self._config.get("api_token")).encode()).hexdigest()[:16]
+        self._extracting = False
+        self._response_cache = None
+        if self._config.get("response_cache.enabled", False):
+            logging.info("Response cache enabled")
+            self._response_cache = ResponseCache(
+                max_size=self._config.get("response_cache.max_size_mb", 512) * 1024 * 1024,
+                path=get_tmp_subfolder("cache/http"),
+                ttl=self._config.get("response_cache.ttl", 86400),
+            )
+
+        # The rate limiter is shared by every call to the same Terraform API endpoint in the process
+        self.api_max_retries = self._config.get("api_max_retries", 5)
+        self.api_max_concurrency = self._config.get("api_max_concurrency", self.api_pool_size)
+        self._rate_limiter = get_rate_limiter(
+            name=self._config.get("api_endpoint", "https://app.terraform.io"),
+            rate=self._config.get("api_rate_limit", 30),
+            max_concurrency=self.api_max_concurrency,
+        )
+
+        self._hedger = None
+        if self._config.get("api_hedging.enabled", False):
+            logging.info("Hedged requests enabled")
+            self._hedger = Hedger(
+                max_workers=self.api_max_concurrency * 2,
+                min_samples=self._config.get("api_hedging.min_samples", 20),
+                percentile=self._config.get("api_hedging.percentile", 95),
+            )
+
     def _build_stack_slug(self, workspace: dict) -> str:
         name = workspace.get("attributes.name")
         if not name:
@@ -72,48 +235,112 @@ class TerraformExporter(BaseExporter):
         drop_response_properties: list | None = None,
         method: str = "GET",
         request_data: dict | None = None,
+        memoize: bool = True,
     ) -> dict:
         logging.debug(f"Start calling API: {url}")
 
-        headers = {
-            "Authorization": f"Bearer {self._config.get('api_token')}",
-            "Content-Type": "application/vnd.api+json",
-        }
+        if method != "GET":
+            try:
+                body = self._get_response_body(url, method=method, request_data=request_data)
+            finally:
+                # Invalidate even if the request failed, as it may still have been applied
+                self._invalidate_memoized_responses(url)
+        elif memoize:
+            body = self._request_memo.call(url, functools.partial(self._get_cached_response_body, url))
+        else:
+            body = self._get_cached_response_body(url)
 
-        try:
-            if request_data is not None:
-                request_data = json.dumps(request_data)
+        data = self._parse_response_body(url, body, drop_response_properties=drop_response_properties)
 
-            response = requests.request(data=request_data, headers=headers, method=method, url=url)
-            logging.debug(request_dump.dump_all(response).decode("utf-8"))
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            # Return None for non-existent API endpoints as we are most likely interacting with an older TFE version
-            if e.response.status_code == HTTPStatus.NOT_FOUND:
-                logging.warning(f"Non-existent API endpoint ({url}). Ignoring.")
-                return {"data": {}}
+        logging.debug("Stop calling API")
 
-            raise RuntimeError(f"HTTP Error: {e}") from e
-        except requests.exceptions.ReadTimeout as e:
-            raise RuntimeError(f"Timeout for {url}") from e
-        except requests.exceptions.ConnectionError as e:
-            raise RuntimeError(f"Connection error for {url}") from e
-        except requests.exceptions.RequestException as e:
-            raise RuntimeError(f"Error for {url}") from e
+        return data
+
+    def _parse_response_body(self, url: str, body: str | None, drop_response_properties: list | None = None) -> dict:
+        if body is None:
+            # Return None for non-existent API endpoints as we are most likely interacting with an older TFE version
+            logging.warning(f"Non-existent API endpoint ({url}). Ignoring.")
+            return {"data": {}}
 
         if drop_response_properties:
             # Drop properties, mostly when they contain the keypath separator benedict uses (ie ".")
-            data = benedict(pydash.omit(response.json(), drop_response_properties))
-        elif len(response.content) == 0:
+            data = benedict(pydash.omit(json.loads(body), drop_response_properties))
+        elif len(body) == 0:
             # The response has no content (e.g. 204 HTTP status code)
             data = benedict()
         else:
-            data = benedict(response.json())
-
-        logging.debug("Stop calling API")
+            data = benedict(json.loads(body))
 
         return data
 
+    def _build_api_url(self, path: str, query: list | None = None) -> str:
+        endpoint = self._config.get("api_endpoint", "https://app.terraform.io")
+        url = f"{endpoint}/api/v2{path}"
+
+        if query:
+            url = f"{url}{'&' if '?' in url else '?'}{urlencode(query)}"
+
+        return url
+
+    def _build_conditional_headers(self, cache_entry: dict | None) -> dict:
+        headers = {}
+        if cache_entry and cache_entry.get("etag"):
+            headers["If-None-Match"] = cache_entry.get("etag")
+        if cache_entry and cache_entry.get("last_modified"):
+            headers["If-Modified-Since"] = cache_entry.get("last_modified")
+
+        return headers
+
+    def _build_sparse_fieldset_query(self, properties: list | None, resource_type: str) -> list:
+        """Build the JSON:API query parameters to only request the given properties
+
+        Args:
+            properties (list | None): Properties (e.g. "attributes.name" or "relationships.project.data.id")
+            resource_type (str): JSON:API resource type
+
+        Returns:
+            list: Query parameters
+        """
+        query = [("page[size]", self.api_page_size)]
+
+        if properties:
+            fields = []
+            for property_ in properties:
+                segments = property_.split(".")
+                if segments[0] in ["attributes", "relationships"] and len(segments) > 1 and segments[1] not in fields:
+                    fields.append(segments[1])
+
+            query.append((f"fields[{resource_type}]", ",".join(fields)))
+
+        return query
+
+    def _call_api_for_page(self, url: str, drop_response_properties: list | None = None, memoize: bool = False) -> dict:
+        """Pull a page from the API, unless it was checkpointed by a previous export that did not complete
+
+        Args:
+            url (str): Page URL
+            drop_response_properties (list | None): Response properties to drop before processing the response
+            memoize (bool): Whether the response can be served from, and stored in, the request memo. Pages of
+                collections are not memoized, so that only the pages being processed are held in memory.
+
+        Returns:
+            dict: Response payload
+        """
+        if not self._extracting or not self.checkpoint_pages:
+            return self._call_api(url, drop_response_properties=drop_response_properties, memoize=memoize)
+
+        key = f"extract/pages/{hashlib.sha256(url.encode()).hexdigest()}"
+
+        response_payload = self._load_checkpoint(key)
+        if response_payload is not None:
+            return benedict(response_payload)
+
+        response_payload = self._call_api(url, drop_response_properties=drop_response_properties, memoize=memoize)
+        self._save_checkpoint(key, response_payload)
+
+        return response_payload
+
+    @consumes("agent_pools", "modules", "policies", "workspace_variables", "workspaces", stage="check")
     def _check_data(self, data: list[dict]) -> list[dict]:
         logging.info("Start checking data")
 
@@ -127,6 +354,7 @@ class TerraformExporter(BaseExporter):
 
         return data
 
+    @consumes("agent_pools", stage="check")
     def _check_agent_pools_data(self, data: list[dict]) -> list[dict]:
         logging.info("Start checking agent pools data")
 
@@ -142,6 +370,7 @@ class TerraformExporter(BaseExporter):
 
         return data
 
+    @consumes("modules", stage="check")
     def _check_modules_data(self, data: list[dict]) -> list[dict]:
         logging.info("Start checking modules data")
 
@@ -157,6 +386,7 @@ class TerraformExporter(BaseExporter):
 
         return data
 
+    @consumes("policies", stage="check")
     def _check_policies_data(self, data: list[dict]) -> list[dict]:
         logging.info("Start checking policies data")
 
@@ -184,6 +414,7 @@ class TerraformExporter(BaseExporter):
 
         logging.info("Stop checking requirements")
 
+    @consumes("workspace_variables", stage="check")
     def _check_workspace_variables_data(self, data: list[dict]) -> list[dict]:
         logging.info("Start checking workspace variables data")
 
@@ -200,6 +431,7 @@ class TerraformExporter(BaseExporter):
 
         return data
 
+    @consumes("workspaces", stage="check")
     def _check_workspaces_data(self, data: list[dict]) -> list[dict]:
         logging.info("Start checking workspaces data")
 
@@ -238,6 +470,108 @@ class TerraformExporter(BaseExporter):
 
         return data
 
+    def _count_collection(self, path: str, include_pattern: str | None = None, resource_type: str | None = None) -> int:
+        """Count the entities of a collection, from the pagination metadata of its first page when possible
+
+        Args:
+            path (str): API path, relative to the API base URL
+            include_pattern (str | None): Regex that entity names must match for the entities to be counted
+            resource_type (str | None): JSON:API resource type
+
+        Returns:
+            int: Number of entities
+        """
+        if include_pattern is None:
+            response_payload = self._call_api(self._build_api_url(path, query=[("page[size]", 1)]))
+            if response_payload.get("meta.pagination.total-count") is not None:
+                return response_payload.get("meta.pagination.total-count")
+
+        # Names have to be matched against the include pattern, and older Terraform Enterprise versions do not
+        # return pagination metadata
+        return len(
+            self._extract_data_from_api(
+                include_pattern=include_pattern, path=path, properties=["attributes.name"], resource_type=resource_type
+            )
+        )
+
+    def _count_data(self) -> dict | None:
+        logging.info("Start counting data")
+
+        organizations = self._extract_organization_data()
+
+        collections = {
+            "agent_pools": "agent-pools",
+            "modules": "registry-modules",
+            "policies": "policies",
+            "policy_sets": "policy-sets",
+            "projects": "projects",
+            "providers": "registry-providers",
+            "tasks": "tasks",
+            "teams": "teams",
+            "workspaces": "workspaces",
+        }
+        if self.experimental_support_variable_sets:
+            collections["variable_sets"] = "varsets"
+
+        def count(task: tuple) -> int | None:
+            organization, entity_type = task
+
+            if entity_type == "workspace_variables":
+                return self._count_organization_workspace_variables(organization)
+
+            path = f"/organizations/{organization.get('id')}/{collections[entity_type]}"
+            include_pattern = None
+            if entity_type == "workspaces":
+                include_pattern = self._config.get("include.workspaces")
+                search_term = self._get_name_search_term(include_pattern)
+                if search_term:
+                    path = f"{path}?{urlencode({'search[name]': search_term})}"
+
+            return self._count_collection(path, include_pattern=include_pattern, resource_type=collections[entity_type])
+
+        tasks = [
+            (organization, entity_type)
+            for organization in organizations
+            for entity_type in [*collections, "workspace_variables"]
+        ]
+
+        data = {"organizations": len(organizations)}
+        for (_, entity_type), entity_count in zip(tasks, self._map_concurrently(count, tasks), strict=True):
+            if entity_count is None or data.get(entity_type, 0) is None:
+                data[entity_type] = None
+            else:
+                data[entity_type] = data.get(entity_type, 0) + entity_count
+
+        logging.info("Stop counting data")
+
+        return data
+
+    def _count_organization_workspace_variables(self, organization: dict) -> int | None:
+        """Count the variables of all the workspaces in an organization, if the Terraform API supports it
+
+        Args:
+            organization (dict): Organization
+
+        Returns:
+            int | None: Number of variables, or None if they cannot be counted without listing every workspace
+        """
+        # Variables of excluded workspaces would be counted as well
+        if self._config.get("include.workspaces") or not self._is_bulk_variable_extraction_supported(organization):
+            return None
+
+        query = urlencode({"filter[organization][name]": organization.get("attributes.name"), "page[size]": 1})
+        try:
+            response_payload = self._call_api(self._build_api_url(f"/vars?{query}"))
+        except TerraformExporterHTTPError as e:
+            if e.status_code not in [HTTPStatus.BAD_REQUEST, HTTPStatus.UNPROCESSABLE_ENTITY]:
+                raise
+
+            self._bulk_variable_unsupported_organization_ids.add(organization.get("id"))
+
+            return None
+
+        return response_payload.get("meta.pagination.total-count")
+
     def _create_agent_pool(self, organization_id: str) -> str:
         agent_pool_request_data = {
             "data": {
@@ -288,8 +622,8 @@ class TerraformExporter(BaseExporter):
             path=f"/agent-pools/{id_}",
         )
 
-    def _get_log_data_from_disk(self, id_: str):
-        log_path_on_disk = f"{self.tempdir}/{id_}.txt"
+    def _get_log_data_from_disk(self, id_: str, tempdir: str | None = None):
+        log_path_on_disk = f"{tempdir or self.tempdir}/{id_}.txt"
         logging.info(f"Reading log data from '{log_path_on_disk}'")
         p = Path(log_path_on_disk)
         with p.open(mode="r") as f:
@@ -301,10 +635,8 @@ class TerraformExporter(BaseExporter):
     def _download_text_file(self, url: str) -> str:
         logging.info("Start downloading text file")
 
-        headers = {
-            "Authorization": f"Bearer {self._config.get('api_token')}",
-        }
-        response = requests.get(allow_redirects=True, headers=headers, url=url)
+        # The download URL does not point to a JSON:API endpoint, so the default content type is dropped
+        response = self._send_request(allow_redirects=True, headers={"Content-Type": None}, method="GET", url=url)
         logging.debug(request_dump.dump_all(response).decode("utf-8"))
 
         logging.info("Stop downloading text file")
@@ -345,29 +677,57 @@ class TerraformExporter(BaseExporter):
 
         logging.info("Stop downloading state files")
 
-    def _enrich_variable_set_data(self, data: dict) -> dict: # noqa: PLR0912, PLR0915
-        def reset_variable_set_relationships(var_set_id: str, variable_set_relationship_backup: dict) -> None:
+    def _apply_captured_variable_set_values(self, data: dict, captured_values: dict) -> None:
+        """Apply the values captured from a variable set plan output to the extracted data
 
-            request = {}
-            if variable_set_relationship_backup.get("relationships.workspaces.data") is not None:
-                request["workspaces"] = {"data": variable_set_relationship_backup.get("relationships.workspaces.data")}
-            if variable_set_relationship_backup.get("relationships.projects.data") is not None:
-                request["projects"] = {"data": variable_set_relationship_backup.get("relationships.projects.data")}
+        Args:
+            data (dict): Extracted data
+            captured_values (dict): Captured variable values, indexed by variable ID
+        """
+        for variable_id, value in captured_values.items():
+            variable = self._get_entity(data, "variable_set_variables", variable_id)
+            if variable is not None:
+                variable["attributes.value"] = value
 
-            self._extract_data_from_api(
-                method="PATCH",
-                path=f"/varsets/{var_set_id}",
-                request_data={
-                    "data": {
-                        "attributes": {
-                            "priority": variable_set_relationship_backup.get("attributes.priority"),
-                            "global": variable_set_relationship_backup.get("attributes.global"),
-                        },
-                        "relationships": request
-                    }
+    def _create_variable_set_enrichment_workspace(self, organization_id: str, project_id: str, name: str) -> str:
+        """Create a temporary workspace to capture variable set values with
+
+        Args:
+            organization_id (str): Organization ID
+            project_id (str): ID of the project to create the workspace in
+            name (str): Workspace name
+
+        Returns:
+            str: Workspace ID
+        """
+        logging.info(f"Creating the '{organization_id}/{name}' temporary workspace")
+        workspace_data = self._extract_data_from_api(
+            method="POST",
+            path=f"/organizations/{organization_id}/workspaces",
+            properties=["id"],
+            request_data={
+                "data": {
+                    "relationships": {
+                        "project": {
+                            "data": {
+                                "id": project_id,
+                                "type": "projects"
+                            }
+                        }
+                    },
+                    "attributes": {
+                        "name": name,
+                        "execution-mode": "remote",
+                    },
+                    "type": "workspaces",
                 }
-            )
+            },
+        )
+
+        return workspace_data[0].get("id")
 
+    @consumes("organizations", "variable_set_variables", "variable_sets", stage="enrich")
+    def _enrich_variable_set_data(self, data: dict) -> dict:  # noqa: PLR0912, PLR0915
         if not is_command_available(["docker", "ps"], execute=True):
             logging.warning("Docker is not available. Skipping enriching workspace variables data.")
             return data
@@ -380,226 +740,401 @@ class TerraformExporter(BaseExporter):
 
         logging.info("Start enriching variable_set data")
 
-        new_workspace = None
-        variable_set_relationship_backup = None
-        var_set_reset = True
-        var_set_id = None
-        agent_container = None
-        agent_pool_id = None
+        variables_by_variable_set = {}
+        for variable in data.get("variable_set_variables"):
+            variable_set_variables = variables_by_variable_set.setdefault(
+                variable.get("relationships.varset.data.id"), {}
+            )
+            variable_set_variables[variable.get("id")] = variable.get("attributes.key")
 
-        try:
-            for organization in data.get("organizations"):
-                # Get Default Project
-                projects = self._extract_data_from_api(
-                    path=f"/organizations/{organization.get('id')}/projects",
-                    properties=[
-                        "id",
-                        "attributes.name"
-                    ],
+        num_workers = self.parallel_enrichment_workers
+        data_lock = threading.Lock()
+
+        for organization in data.get("organizations"):
+            organization_id = organization.get("id")
+
+            # Find variable sets in the current org
+            var_set_ids = [
+                variable_set.get("id")
+                for variable_set in data.get("variable_sets")
+                if variable_set.get("relationships.organization.data.id") == organization_id
+            ]
+
+            # Resume from a previous export that did not complete
+            for var_set_id in list(var_set_ids):
+                variable_set_relationship_backup = self._load_checkpoint(f"enrich/variable_set_backups/{var_set_id}")
+                if variable_set_relationship_backup is not None:
+                    logging.warning(f"Restoring variable set '{var_set_id}' left over by a previous export")
+                    self._restore_variable_set_relationships(var_set_id, benedict(variable_set_relationship_backup))
+                    self._delete_checkpoint(f"enrich/variable_set_backups/{var_set_id}")
+
+                captured_values = self._load_checkpoint(f"enrich/variable_sets/{var_set_id}")
+                if captured_values is not None:
+                    logging.info(f"Variable set '{organization_id}/{var_set_id}' data already enriched")
+                    self._apply_captured_variable_set_values(data, captured_values)
+                    var_set_ids.remove(var_set_id)
+
+            if len(var_set_ids) == 0:
+                continue
+
+            # Get Default Project
+            default_project_id = None
+            for project in self._extract_projects_data(organization):
+                if project.get("attributes.name") == "Default Project":
+                    default_project_id = project.get("id")
+
+            agent_pool_id = None
+            agent_containers: list[Container] = []
+            workspace_ids: list[str] = []
+            pending_restorations: dict[str, dict] = {}
+
+            try:
+                logging.info(f"Start local TFC/TFE agent(s) for organization '{organization_id}'")
+
+                agent_pool_id = self._create_agent_pool(organization_id=organization_id)
+
+                actual_workers = min(num_workers, len(var_set_ids))
+                logging.info(
+                    f"Starting {actual_workers} agent container(s) for {len(var_set_ids)} variable set(s)"
                 )
 
-                default_project_id = None
-                for project in projects:
-                    if project.get("attributes.name") == "Default Project":
-                        default_project_id = project.get("id")
+                shared_tempdir = tempfile.mkdtemp()
+
+                for i in range(actual_workers):
+                    agent_container_name = f"smk-tfc-agent-{organization_id}-{i}"
+                    container, _ = self._start_agent_container(
+                        agent_pool_id=agent_pool_id,
+                        container_name=agent_container_name,
+                        worker_tempdir=shared_tempdir,
+                    )
+                    agent_containers.append(container)
+
+                # Each worker captures variable set values with its own temporary workspace. The first one keeps the
+                # historical name, so that a single worker works with push images that do not support WORKSPACE.
+                workspace_names = ["SMK"] + [f"SMK-{i}" for i in range(1, actual_workers)]
+                for workspace_name in workspace_names:
+                    workspace_ids.append(
+                        self._create_variable_set_enrichment_workspace(
+                            organization_id=organization_id, project_id=default_project_id, name=workspace_name
+                        )
+                    )
 
-                logging.info(f"Start local TFC/TFE agent for organization '{organization.get('id')}'")
-                agent_pool_id = self._create_agent_pool(organization_id=organization.get("id"))
-                agent_container_name = f"smk-tfc-agent-{organization.get('id')}"
-                agent_container, self.tempdir = self._start_agent_container(
-                    agent_pool_id=agent_pool_id, container_name=agent_container_name
+                # Push arbitrary data to the workspaces
+                self._map_concurrently(
+                    functools.partial(
+                        self._push_variable_set_enrichment_workspace,
+                        organization_name=organization.get("attributes.name"),
+                    ),
+                    workspace_names,
+                    max_workers=actual_workers,
                 )
-                # Store the container ID in case it gets stopped and we need it for the error message
-                agent_container_id = agent_container.id
-
-                # Create a workspace
-                new_workspace = self._extract_data_from_api(
-                    method="POST",
-                    path=f"/organizations/{organization.get('id')}/workspaces",
-                    properties=["id"],
-                    request_data={
-                        "data": {
-                            "relationships": {
-                                "project": {
-                                    "data": {
-                                        "id": default_project_id,
-                                        "type": "projects"
-                                    }
-                                }
-                            },
-                            "attributes": {
-                                "name": "SMK",
-                                "execution-mode": "remote",
-                            },
-                            "type": "workspaces",
-                        }
-                    },
-                )[0]
 
-                # Push arbitrary data to the workspace
-                push = docker.run(
-                    detach=False,
-                    envs={
-                        "ORG": organization.get("attributes.name"),
-                    },
-                    image=self._config.get("push_image", "ghcr.io/spacelift-io/terraform-push:latest"),
-                    pull="always",
-                    remove=True,
-                    volumes={
-                        (f"{os.environ['HOME']}/.terraform.d/", "/root/.terraform.d/"),
+                # Push images that ignore WORKSPACE push every configuration to the "SMK" workspace, in which case
+                # variable sets are enriched one at a time with that workspace only
+                if len(workspace_ids) > 1 and not all(
+                    self._has_current_configuration_version(workspace_id) for workspace_id in workspace_ids[1:]
+                ):
+                    logging.warning(
+                        f"The push image did not push a configuration to every '{organization_id}' temporary "
+                        "workspace, most likely because it does not support the WORKSPACE environment variable. "
+                        "Falling back to enriching variable sets one at a time."
+                    )
+
+                    while len(workspace_ids) > 1:
+                        workspace_id = workspace_ids.pop()
+                        logging.info(f"Deleting workspace {workspace_id}")
+                        self._extract_data_from_api(method="DELETE", path=f"/workspaces/{workspace_id}")
+
+                    while len(agent_containers) > 1:
+                        self._stop_agent_container(agent_containers.pop())
+
+                # Update the workspaces to use the TFC agent
+                for workspace_id in workspace_ids:
+                    self._use_agent_pool(workspace_id=workspace_id, agent_pool_id=agent_pool_id)
+
+                available_workspace_ids = queue.Queue()
+                retired_workspace_ids = set()
+                for workspace_id in workspace_ids:
+                    available_workspace_ids.put(workspace_id)
+
+                with ThreadPoolExecutor(max_workers=len(workspace_ids)) as executor:
+                    futures = {
+                        executor.submit(
+                            self._process_single_variable_set_enrichment,
+                            var_set_id=var_set_id,
+                            variables=variables_by_variable_set.get(var_set_id, {}),
+                            organization_id=organization_id,
+                            available_workspace_ids=available_workspace_ids,
+                            retired_workspace_ids=retired_workspace_ids,
+                            workspace_count=len(workspace_ids),
+                            data=data,
+                            data_lock=data_lock,
+                            worker_tempdir=shared_tempdir,
+                        ): var_set_id
+                        for var_set_id in var_set_ids
                     }
-                )
-                logging.info(push)
-
-                #Update workspace to use the TFC agent
-                self._extract_data_from_api(
-                    method="PATCH",
-                    path=f"/workspaces/{new_workspace.get('id')}",
-                    request_data={
-                        "data": {
-                            "attributes": {
-                                "agent-pool-id": agent_pool_id,
-                                "execution-mode": "agent",
-                                "setting-overwrites": {"execution-mode": True, "agent-pool": True},
-                            },
-                            "type": "workspaces",
-                        }
-                    },
-                )
 
-                # Find variable sets in the current org
-                variable_sets_in_organization = []
-                for variable_set in data.get("variable_sets"):
-                    if variable_set.get("relationships.organization.data.id") == organization.get("id"):
-                        variable_sets_in_organization.append(variable_set)
-
-                for var_set in variable_sets_in_organization:
-                    var_set_id = var_set.get("id")
-
-                    # Backup variable attachment info
-                    variable_set_relationship_backup = self._extract_data_from_api(
-                        path=f"/varsets/{var_set_id}",
-                        properties=[
-                            "attributes.name",
-                            "attributes.global",
-                            "attributes.priority",
-                            "relationships.workspaces.data",
-                            "relationships.projects.data",
-                            "relationships.organizations.data"
-                        ],
-                    )[0]
-
-                    logging.info(f"Updating {var_set_id} to attach to the workspace {new_workspace.get('id')}")
-                    var_set_reset = False
-                    # Add Var Set to only the new workspace and set it as priority
+                    for future in as_completed(futures):
+                        var_set_id = futures[future]
+                        try:
+                            vs_id, backup = future.result()
+                        except Exception:
+                            logging.warning(f"Variable set '{organization_id}/{var_set_id}' data not enriched")
+                            continue
+
+                        if backup is None:
+                            logging.info(f"Variable set '{organization_id}/{var_set_id}' data enriched")
+                        else:
+                            logging.warning(
+                                f"Variable set '{organization_id}/{var_set_id}' data not enriched. "
+                                "Its relationships will be restored once the other variable sets are processed."
+                            )
+                            pending_restorations[vs_id] = backup
+
+                for container in agent_containers:
+                    if container.exists() and container.state.running:
+                        logging.debug(f"Local TFC/TFE agent Docker container '{container.id}' logs:")
+                        logging.debug(container.logs())
+
+            finally:
+                logging.info(f"Stop local TFC/TFE agent(s) for organization '{organization_id}'")
+
+                for vs_id, backup in pending_restorations.items():
+                    logging.warning(f"Restoring variable set '{vs_id}' that failed during processing")
+                    self._restore_variable_set_relationships(vs_id, backup)
+                    self._delete_checkpoint(f"enrich/variable_set_backups/{vs_id}")
+
+                for workspace_id in workspace_ids:
+                    logging.info(f"Deleting workspace {workspace_id}")
                     self._extract_data_from_api(
-                        method="PATCH",
-                        path=f"/varsets/{var_set_id}",
-                        request_data={
-                            "data": {
-                                "attributes": {
-                                    "global": False,
-                                    "priority": True,
-                                },
-                                "relationships": {
-                                    "workspaces": {
-                                        "data": [
-                                            {
-                                                "id": new_workspace.get("id"),
-                                                "type": "workspaces"
-                                            }
-                                        ]
-                                    },
-                                    "projects": {
-                                        "data": []
+                        method="DELETE",
+                        path=f"/workspaces/{workspace_id}",
+                    )
+
+                for container in agent_containers:
+                    self._stop_agent_container(container)
+
+                if agent_pool_id:
+                    self._delete_agent_pool(id_=agent_pool_id)
+
+        logging.info("Stop enriching variable_set data")
+
+        return data
+
+    def _needs_entity_type(self, entity_type: str) -> bool:
+        """Check whether an entity type has to be extracted
+
+        Args:
+            entity_type (str): Entity type
+
+        Returns:
+            bool: True if the entity type, or one depending on it, is consumed by the current action
+        """
+        if self._entity_types is None:
+            return True
+
+        # Some entity types are extracted for each entity of another type
+        dependent_entity_types = {"variable_sets": ["variable_set_variables"], "workspaces": ["workspace_variables"]}
+
+        return any(
+            dependent_entity_type in self._entity_types
+            for dependent_entity_type in [entity_type, *dependent_entity_types.get(entity_type, [])]
+        )
+
+    def _process_single_variable_set_enrichment(  # noqa: PLR0913, PLR0915
+        self,
+        var_set_id: str,
+        variables: dict,
+        organization_id: str,
+        available_workspace_ids: queue.Queue,
+        retired_workspace_ids: set[str],
+        workspace_count: int,
+        data: dict,
+        data_lock: threading.Lock,
+        worker_tempdir: str,
+    ) -> tuple[str, dict | None]:
+        """Process a single variable set for variable enrichment.
+
+        The variable set is attached to one of the available temporary workspaces, which is only put back in the queue
+        once the variable set has been detached from it. Otherwise, the workspace is retired, and None is put in the
+        queue when no workspace is left, so that the remaining variable sets fail instead of waiting forever.
+
+        Returns:
+            Tuple of (var_set_id, None) once the variable set has been enriched and restored, or
+            (var_set_id, variable_set_relationship_backup) if it could not be enriched nor restored.
+
+        Raises:
+            Exception: If the variable set could not be enriched, once it has been restored.
+        """
+        # Backup variable attachment info
+        variable_set_relationship_backup = self._extract_data_from_api(
+            path=f"/varsets/{var_set_id}",
+            properties=[
+                "attributes.name",
+                "attributes.global",
+                "attributes.priority",
+                "relationships.workspaces.data",
+                "relationships.projects.data",
+                "relationships.organizations.data"
+            ],
+        )[0]
+
+        # Persist the backup so that the variable set can be restored if the export is interrupted
+        self._save_checkpoint(f"enrich/variable_set_backups/{var_set_id}", variable_set_relationship_backup)
+
+        captured_values = {}
+        workspace_id = available_workspace_ids.get()
+        if workspace_id is None:
+            available_workspace_ids.put(None)
+            self._delete_checkpoint(f"enrich/variable_set_backups/{var_set_id}")
+            raise TerraformExporterNoWorkspaceError(organization_id)
+
+        try:
+            logging.info(f"Updating {var_set_id} to attach to the workspace {workspace_id}")
+            # Add Var Set to only the temporary workspace and set it as priority
+            self._extract_data_from_api(
+                method="PATCH",
+                path=f"/varsets/{var_set_id}",
+                request_data={
+                    "data": {
+                        "attributes": {
+                            "global": False,
+                            "priority": True,
+                        },
+                        "relationships": {
+                            "workspaces": {
+                                "data": [
+                                    {
+                                        "id": workspace_id,
+                                        "type": "workspaces"
                                     }
-                                }
+                                ]
+                            },
+                            "projects": {
+                                "data": []
                             }
                         }
-                    )
+                    }
+                }
+            )
 
-                    logging.info(f"Trigger a plan for the '{organization.get('id')}/{new_workspace.get('id')}' "
-                                 f"workspace")
-                    run_data = self._extract_data_from_api(
-                        method="POST",
-                        path="/runs",
-                        properties=["relationships.plan.data.id", "id"],
-                        request_data={
-                            "data": {
-                                "attributes": {
-                                    "allow-empty-apply": False,
-                                    "plan-only": True,
-                                    "refresh": False,  # No need to waste time refreshing the state
-                                },
-                                "relationships": {
-                                    "workspace": {"data": {"id": new_workspace.get('id'), "type": "workspaces"}},
-                                },
-                                "type": "runs",
-                            }
+            logging.info(f"Trigger a plan for the '{organization_id}/{workspace_id}' workspace")
+            run_data = self._extract_data_from_api(
+                method="POST",
+                path="/runs",
+                properties=["relationships.plan.data.id", "id"],
+                request_data={
+                    "data": {
+                        "attributes": {
+                            "allow-empty-apply": False,
+                            "plan-only": True,
+                            "refresh": False,  # No need to waste time refreshing the state
                         },
-                    )
+                        "relationships": {
+                            "workspace": {"data": {"id": workspace_id, "type": "workspaces"}},
+                        },
+                        "type": "runs",
+                    }
+                },
+            )
 
-                    if len(run_data) == 0:
-                        raise TerraformExporterPlanError(organization.get('id'), new_workspace.get('id'))
+            if len(run_data) == 0:
+                raise TerraformExporterPlanError(organization_id, workspace_id)  # noqa: TRY301
 
-                    # KLUDGE: There should be a way to pull single item from the API instead of a list of items
-                    run_data = run_data[0]
+            # KLUDGE: There should be a way to pull single item from the API instead of a list of items
+            run_data = run_data[0]
 
-                    logging.info("Waiting for plan to finish")
-                    plan_id = run_data.get("relationships.plan.data.id")
-                    plan_data = self._get_plan(id_=plan_id)
-                    run_id = run_data.get("id")
+            logging.info(f"Waiting for plan to finish ({organization_id}/{var_set_id})")
+            plan_id = run_data.get("relationships.plan.data.id")
+            plan_data = self._get_plan(id_=plan_id)
+            run_id = run_data.get("id")
 
-                    if plan_data.get("attributes.log-read-url"):
-                        logs_data = self._get_log_data_from_disk(run_id)
+            if plan_data.get("attributes.log-read-url"):
+                logs_data = self._get_log_data_from_disk(run_id, tempdir=worker_tempdir)
 
-                        logging.debug("Plan output:")
-                        logging.debug(logs_data)
+                logging.debug("Plan output:")
+                logging.debug(logs_data)
 
-                        logging.info("Extract the env var values from the plan output")
-                        for line in logs_data.split("\n"):
-                            for var in data.get("variable_set_variables"):
-                                if var.get("relationships.varset.data.id") == var_set_id:
-                                    key = var.get("attributes.key")
-                                    if line.startswith(f"{key}="):
-                                        value = line.removeprefix(f"{key}=")
-                                        masked_value = "*" * len(value)
+                logging.info(f"Extract the env var values from the plan output ({organization_id}/{var_set_id})")
+                env_vars = parse_plan_env_vars(logs_data)
+                for variable_id, key in variables.items():
+                    if key in env_vars:
+                        value = env_vars[key]
+                        masked_value = "*" * len(value)
 
-                                        logging.debug(f"Found sensitive env var: '{key}={masked_value}'")
+                        logging.debug(f"Found sensitive env var: '{key}={masked_value}'")
 
-                                        var["attributes.value"] = value
+                        captured_values[variable_id] = value
 
-                    reset_variable_set_relationships(var_set_id, variable_set_relationship_backup)
-                    var_set_reset = True
+                with data_lock:
+                    self._apply_captured_variable_set_values(data, captured_values)
 
-                if agent_container.exists() and agent_container.state.running:
-                    logging.debug(f"Local TFC/TFE agent Docker container '{agent_container_id}' logs:")
-                    logging.debug(agent_container.logs())
+            self._restore_variable_set_relationships(var_set_id, variable_set_relationship_backup)
 
-        finally:
-            logging.info("Stop enriching variable_set data")
+            self._save_checkpoint(f"enrich/variable_sets/{var_set_id}", captured_values)
+            self._delete_checkpoint(f"enrich/variable_set_backups/{var_set_id}")
 
-            if new_workspace is not None:
-                logging.info(f"Deleting workspace {new_workspace.get('id')}")
-                self._extract_data_from_api(
-                    method="DELETE",
-                    path=f"/workspaces/{new_workspace.get('id')}",
-                )
+        except Exception:
+            logging.exception(f"Error processing variable set '{organization_id}/{var_set_id}'")
 
-            if not var_set_reset:
-                reset_variable_set_relationships(var_set_id, variable_set_relationship_backup)
+            # Detach the variable set before another one is processed with the same workspace
+            try:
+                self._restore_variable_set_relationships(var_set_id, variable_set_relationship_backup)
+                self._delete_checkpoint(f"enrich/variable_set_backups/{var_set_id}")
+            except Exception:
+                logging.exception(f"Failed to restore variable set '{organization_id}/{var_set_id}'")
 
-            if agent_container:
-                self._stop_agent_container(agent_container)
+                # The variable set may still be attached to the workspace, and would override the next ones
+                logging.warning(f"Retiring the '{organization_id}/{workspace_id}' temporary workspace")
+                with data_lock:
+                    retired_workspace_ids.add(workspace_id)
+                    if len(retired_workspace_ids) == workspace_count:
+                        available_workspace_ids.put(None)
 
-            if agent_pool_id:
-                self._delete_agent_pool(id_=agent_pool_id)
+                return var_set_id, variable_set_relationship_backup
 
+            available_workspace_ids.put(workspace_id)
 
-        return data
+            raise
+        else:
+            available_workspace_ids.put(workspace_id)
 
+            return var_set_id, None
 
-    def _process_single_workspace_enrichment(  # noqa: PLR0913, PLR0915
+    def _has_current_configuration_version(self, workspace_id: str) -> bool:
+        workspace_data = self._extract_data_from_api(
+            path=f"/workspaces/{workspace_id}",
+            properties=["relationships.current-configuration-version.data.id"],
+        )
+
+        return (
+            len(workspace_data) > 0
+            and workspace_data[0].get("relationships.current-configuration-version.data.id") is not None
+        )
+
+    def _push_variable_set_enrichment_workspace(self, workspace_name: str, organization_name: str) -> None:
+        """Push an arbitrary configuration to a temporary workspace, so that plans can be triggered for it
+
+        Args:
+            workspace_name (str): Workspace name
+            organization_name (str): Organization name
+        """
+        push = docker.run(
+            detach=False,
+            envs={
+                "ORG": organization_name,
+                "WORKSPACE": workspace_name,
+            },
+            image=self._config.get("push_image", "ghcr.io/spacelift-io/terraform-push:latest"),
+            pull="always",
+            remove=True,
+            volumes={
+                (f"{os.environ['HOME']}/.terraform.d/", "/root/.terraform.d/"),
+            }
+        )
+        logging.info(push)
+
+    def _process_single_workspace_enrichment(  # noqa: PLR0913
         self,
         workspace_id: str,
         workspace_variables: dict,
@@ -615,19 +1150,7 @@ class TerraformExporter(BaseExporter):
             Tuple of (workspace_id, workspace_data_backup) for cleanup tracking.
             Returns (workspace_id, None) if the workspace was skipped or already restored.
         """
-        def find_workspace_local(workspace_id: str) -> dict:
-            for workspace in data.get("workspaces"):
-                if workspace.get("id") == workspace_id:
-                    return workspace
-            return None
-
-        def find_variable_local(variable_id: str) -> dict:
-            for variable in data.get("workspace_variables"):
-                if variable.get("id") == variable_id:
-                    return variable
-            return None
-
-        workspace = find_workspace_local(workspace_id)
+        workspace = self._get_entity(data, "workspaces", workspace_id)
         current_configuration_version_id = workspace.get(
             "relationships.current-configuration-version.data.id"
         ) if workspace else None
@@ -645,25 +1168,18 @@ class TerraformExporter(BaseExporter):
                 "attributes.execution-mode",
                 "attributes.setting-overwrites",
                 "relationships.agent-pool",
+                "relationships.organization.data.id",
             ],
         )[0]
 
+        # Persist the backup so that the workspace can be restored if the export is interrupted
+        self._save_checkpoint(f"enrich/backups/{workspace_id}", workspace_data_backup)
+
+        captured_values = {"branch": None, "variables": {}}
+
         try:
             logging.info(f"Updating the '{organization_id}/{workspace_id}' workspace to use the TFC Agent")
-            self._extract_data_from_api(
-                method="PATCH",
-                path=f"/workspaces/{workspace_id}",
-                request_data={
-                    "data": {
-                        "attributes": {
-                            "agent-pool-id": agent_pool_id,
-                            "execution-mode": "agent",
-                            "setting-overwrites": {"execution-mode": True, "agent-pool": True},
-                        },
-                        "type": "workspaces",
-                    }
-                },
-            )
+            self._use_agent_pool(workspace_id=workspace_id, agent_pool_id=agent_pool_id)
 
             logging.info(f"Trigger a plan for the '{organization_id}/{workspace_id}' workspace")
             run_data = self._extract_data_from_api(
@@ -708,49 +1224,56 @@ class TerraformExporter(BaseExporter):
                 logging.debug(logs_data)
 
                 logging.info(f"Extract the env var values from the plan output ({organization_id}/{workspace_id})")
-                with data_lock:
-                    for line in logs_data.split("\n"):
-                        for workspace_variable_id, workspace_variable_name in workspace_variables.items():
-                            prefix = f"{workspace_variable_name}="
-                            if line.startswith(prefix):
-                                value = line.removeprefix(prefix)
-                                masked_value = "*" * len(value)
-
-                                logging.debug(
-                                    f"Found sensitive env var: '{workspace_variable_name}={masked_value}'"
-                                )
+                env_vars = parse_plan_env_vars(logs_data)
+                for workspace_variable_id, workspace_variable_name in workspace_variables.items():
+                    if workspace_variable_name in env_vars:
+                        value = env_vars[workspace_variable_name]
+                        masked_value = "*" * len(value)
+
+                        logging.debug(f"Found sensitive env var: '{workspace_variable_name}={masked_value}'")
 
-                                variable = find_variable_local(workspace_variable_id)
-                                if variable:
-                                    variable["attributes.value"] = value
+                        captured_values["variables"][workspace_variable_id] = value
 
-                        # KLUDGE: Ideally this should be retrieved independently for more clarity,
-                        # and only if needed.
-                        if line.startswith("ATLAS_CONFIGURATION_VERSION_GITHUB_BRANCH="):
-                            branch_name = line.removeprefix("ATLAS_CONFIGURATION_VERSION_GITHUB_BRANCH=")
-                            ws = find_workspace_local(workspace_id)
-                            if ws and not ws.get("attributes.vcs-repo.branch"):
-                                ws["attributes.vcs-repo.branch"] = branch_name
+                # KLUDGE: Ideally this should be retrieved independently for more clarity,
+                # and only if needed.
+                if "ATLAS_CONFIGURATION_VERSION_GITHUB_BRANCH" in env_vars:
+                    captured_values["branch"] = env_vars["ATLAS_CONFIGURATION_VERSION_GITHUB_BRANCH"]
+
+                with data_lock:
+                    self._apply_captured_workspace_values(data, workspace_id, captured_values)
 
             self._restore_workspace_exec_mode(organization_id, workspace_id, workspace_data_backup)
 
+            self._save_checkpoint(f"enrich/workspaces/{workspace_id}", captured_values)
+            self._delete_checkpoint(f"enrich/backups/{workspace_id}")
+
         except Exception:
             logging.exception(f"Error processing workspace '{organization_id}/{workspace_id}'")
             return workspace_id, workspace_data_backup
         else:
             return workspace_id, None
 
-    # KLUDGE: We should break this function down in smaller functions
-    def _enrich_workspace_variable_data(self, data: dict) -> dict:  # noqa: PLR0912, PLR0915
-        def find_workspace(data: dict, workspace_id: str) -> dict:
-            for workspace in data.get("workspaces"):
-                if workspace.get("id") == workspace_id:
-                    return workspace
+    def _apply_captured_workspace_values(self, data: dict, workspace_id: str, captured_values: dict) -> None:
+        """Apply the values captured from a workspace plan output to the extracted data
 
-            logging.warning(f"Could not find workspace '{workspace_id}'")
+        Args:
+            data (dict): Extracted data
+            workspace_id (str): Workspace ID
+            captured_values (dict): Captured variable values, indexed by variable ID, and VCS branch
+        """
+        for variable_id, value in captured_values.get("variables").items():
+            variable = self._get_entity(data, "workspace_variables", variable_id)
+            if variable is not None:
+                variable["attributes.value"] = value
 
-            return None
+        if captured_values.get("branch"):
+            workspace = self._get_entity(data, "workspaces", workspace_id)
+            if workspace is not None and not workspace.get("attributes.vcs-repo.branch"):
+                workspace["attributes.vcs-repo.branch"] = captured_values.get("branch")
 
+    # KLUDGE: We should break this function down in smaller functions
+    @consumes("workspace_variables", "workspaces", stage="enrich")
+    def _enrich_workspace_variable_data(self, data: dict) -> dict:  # noqa: PLR0912, PLR0915
         if not is_command_available(["docker", "ps"], execute=True):
             logging.warning("Docker is not available. Skipping enriching workspace variables data.")
             return data
@@ -768,8 +1291,15 @@ class TerraformExporter(BaseExporter):
             if variable.get("attributes.sensitive") is False:
                 continue
 
+            # Values captured by a previous export are reused
+            if variable.get("attributes.value") is not None:
+                continue
+
             workspace_id = variable.get("relationships.workspace.data.id")
-            organization_id = find_workspace(data, workspace_id).get("relationships.organization.data.id")
+            workspace = self._get_entity(data, "workspaces", workspace_id)
+            if workspace is None:
+                logging.warning(f"Could not find workspace '{workspace_id}'")
+            organization_id = workspace.get("relationships.organization.data.id")
 
             if organization_id not in organizations:
                 organizations[organization_id] = benedict()
@@ -782,6 +1312,25 @@ class TerraformExporter(BaseExporter):
         if len(organizations) == 0 or len(organizations.keys()) == 0:
             return data
 
+        # Resume from a previous export that did not complete
+        for organization_id, workspaces in organizations.items():
+            for workspace_id in list(workspaces.keys()):
+                workspace_data_backup = self._load_checkpoint(f"enrich/backups/{workspace_id}")
+                if workspace_data_backup is not None:
+                    logging.warning(f"Restoring workspace '{workspace_id}' left over by a previous export")
+                    self._restore_workspace_exec_mode(organization_id, workspace_id, benedict(workspace_data_backup))
+                    self._delete_checkpoint(f"enrich/backups/{workspace_id}")
+
+                captured_values = self._load_checkpoint(f"enrich/workspaces/{workspace_id}")
+                if captured_values is not None:
+                    logging.info(f"Workspace '{organization_id}/{workspace_id}' variable data already enriched")
+                    self._apply_captured_workspace_values(data, workspace_id, captured_values)
+                    del workspaces[workspace_id]
+
+        organizations = benedict({key: value for key, value in organizations.items() if len(value) > 0})
+        if len(organizations) == 0:
+            return data
+
         num_workers = self.parallel_enrichment_workers
         data_lock = threading.Lock()
 
@@ -849,6 +1398,7 @@ class TerraformExporter(BaseExporter):
                 for ws_id, backup in pending_restorations.items():
                     logging.warning(f"Restoring workspace '{ws_id}' that failed during processing")
                     self._restore_workspace_exec_mode(organization_id, ws_id, backup)
+                    self._delete_checkpoint(f"enrich/backups/{ws_id}")
 
                 for container in agent_containers:
                     self._stop_agent_container(container)
@@ -860,6 +1410,7 @@ class TerraformExporter(BaseExporter):
 
         return data
 
+    @consumes(stage="enrich")
     def _enrich_data(self, data: dict) -> dict:
         logging.info("Start enriching data")
 
@@ -873,26 +1424,28 @@ class TerraformExporter(BaseExporter):
         return data
 
     def _expand_relationships(self, data: dict) -> dict:
+        stripped_entities = {}
+
         def find_entity(data: dict, type_: str, id_: str) -> dict:
             # KLUDGE: Pluralize the type if not already pluralized
             # This should be made more robust
             if not type_.endswith("s"):
                 type_ = f"{type_}s"
 
-            for src_datum in data.get(type_):
-                if src_datum.get("_source_id") == id_:
-                    # Clone to avoid modifying the original dict when removing the relationships
-                    # on the expanded relationship
-                    datum = src_datum.clone()
+            src_datum = self._get_entity(data, type_, id_, id_keypath="_source_id")
+            if src_datum is None:
+                return None
 
-                    if "_relationships" in datum:
-                        del datum["_relationships"]
-
-                    return datum
+            # Copy without the relationships, so that the original dict is not modified. The copy is shallow, and
+            # shared by every relationship to the entity until the entity itself gets expanded.
+            if (type_, id_) not in stripped_entities:
+                stripped_entities[(type_, id_)] = {
+                    key: value for key, value in src_datum.items() if key != "_relationships"
+                }
 
-            return None
+            return stripped_entities[(type_, id_)]
 
-        def expand_relationship(entity_data) -> None:
+        def expand_relationship(entity_type: str, entity_data) -> None:
             for datum in entity_data:
                 relationships = {}
                 if datum.get("_relationships"):
@@ -906,6 +1459,9 @@ class TerraformExporter(BaseExporter):
                     {"_migration_id": self._generate_migration_id(datum.get("name")), "_relationships": relationships}
                 )
 
+                # Relationships to this entity now have to include its migration ID
+                stripped_entities.pop((entity_type, datum.get("_source_id")), None)
+
         logging.info("Start expanding relationships")
 
         for entity_type, entity_data in data.items():
@@ -913,7 +1469,7 @@ class TerraformExporter(BaseExporter):
                 # KLUDGE: Context and context variable relationships get expanded below
                 continue
 
-            expand_relationship(entity_data)
+            expand_relationship(entity_type, entity_data)
 
         # KLUDGE: Context and context variable relationships need to be expanded after stacks'
         # so that the stack migration ID is present
@@ -924,52 +1480,151 @@ class TerraformExporter(BaseExporter):
 
         return data
 
+    def _extract_all_workspace_variables_data(self, data: dict) -> list[dict]:
+        result = []
+
+        # Variables are only pulled for the workspaces that changed since the previous export, if any
+        unchanged_workspaces = self._get_unchanged_workspaces(data.workspaces)
+        workspaces = [workspace for workspace in data.workspaces if workspace.get("id") not in unchanged_workspaces]
+        if len(unchanged_workspaces) > 0:
+            logging.info(
+                f"Reusing the variables of {len(unchanged_workspaces)} unchanged workspace(s): "
+                f"{', '.join(sorted(unchanged_workspaces))}"
+            )
+
+        if self.bulk_variable_extraction:
+            variables = self._extract_workspace_variables_data_in_bulk(data, workspaces)
+        else:
+            variables = self._map_concurrently(self._extract_checkpointed_workspace_variables_data, workspaces)
+        variables = dict(zip([workspace.get("id") for workspace in workspaces], variables, strict=True))
+
+        previous_variables = {}
+        if len(unchanged_workspaces) > 0:
+            for variable in self._previous_data.get("workspace_variables", []):
+                workspace_id = variable.get("relationships.workspace.data.id")
+                previous_variables.setdefault(workspace_id, []).append(benedict(variable))
+
+        for workspace in data.workspaces:
+            if workspace.get("id") in unchanged_workspaces:
+                result.extend(previous_variables.get(workspace.get("id"), []))
+
+                # The branch may have been captured while enriching the data during the previous export
+                previous_branch = unchanged_workspaces[workspace.get("id")].get("attributes.vcs-repo.branch")
+                if previous_branch and not workspace.get("attributes.vcs-repo.branch"):
+                    workspace["attributes.vcs-repo.branch"] = previous_branch
+            else:
+                result.extend(variables[workspace.get("id")])
+
+        return result
+
+    def _extract_checkpointed_data(self, key: str, func: Callable, *args) -> list[dict]:
+        """Extract data, unless it was already extracted by a previous export that did not complete
+
+        Args:
+            key (str): Checkpoint key
+            func (Callable): Extraction function
+            *args: Extraction function arguments
+
+        Returns:
+            list[dict]: Extracted entities
+        """
+        data = self._load_checkpoint(key)
+        if data is not None:
+            return [benedict(datum) for datum in data]
+
+        data = func(*args)
+        self._save_checkpoint(key, data)
+
+        return data
+
+    def _extract_checkpointed_workspace_variables_data(self, workspace: dict) -> list[dict]:
+        return self._extract_checkpointed_data(
+            f"extract/{workspace.get('id')}/variables", self._extract_workspace_variables_data, workspace
+        )
+
     def _extract_data(self) -> list[dict]:
         logging.info("Start extracting data")
-        data = benedict(
-            {
-                "agent_pools": [],
-                "modules": [],
-                "organizations": self._extract_organization_data(),
-                "policies": [],
-                "policy_sets": [],
-                "projects": [],
-                "providers": [],
-                "tasks": [],
-                "teams": [],
-                "variable_sets": [],
-                "variable_set_variables": [],
-                "workspace_variables": [],
-                "workspaces": [],
-            }
-        )
 
-        for organization in data.organizations:
-            data["agent_pools"].extend(self._extract_agent_pools_data(organization))
-            data["modules"].extend(self._extract_modules_data(organization))
-            data["policies"].extend(self._extract_policies_data(organization))
-            data["policy_sets"].extend(self._extract_policy_sets_data(organization))
-            data["projects"].extend(self._extract_projects_data(organization))
-            data["providers"].extend(self._extract_providers_data(organization))
-            data["tasks"].extend(self._extract_tasks_data(organization))
-            data["teams"].extend(self._extract_teams_data(organization))
-            data["workspaces"].extend(self._extract_workspaces_data(organization))
+        # Cached responses and page checkpoints are only used while extracting data, never while enriching it
+        self._extracting = True
+
+        try:
+            data = benedict(
+                {
+                    "agent_pools": [],
+                    "modules": [],
+                    "organizations": self._extract_checkpointed_data(
+                        "extract/organizations", self._extract_organization_data
+                    ),
+                    "policies": [],
+                    "policy_sets": [],
+                    "projects": [],
+                    "providers": [],
+                    "tasks": [],
+                    "teams": [],
+                    "variable_sets": [],
+                    "variable_set_variables": [],
+                    "workspace_variables": [],
+                    "workspaces": [],
+                }
+            )
 
+            extractors = {
+                "agent_pools": self._extract_agent_pools_data,
+                "modules": self._extract_modules_data,
+                "policies": self._extract_policies_data,
+                "policy_sets": self._extract_policy_sets_data,
+                "projects": self._extract_projects_data,
+                "providers": self._extract_providers_data,
+                "tasks": self._extract_tasks_data,
+                "teams": self._extract_teams_data,
+                "workspaces": self._extract_workspaces_data,
+            }
             if self.experimental_support_variable_sets:
-                data["variable_sets"].extend(self._extract_variable_sets_data(organization))
+                extractors["variable_sets"] = self._extract_variable_sets_data
 
-        if self.experimental_support_variable_sets:
-            for variable_set in data.variable_sets:
-                data["variable_set_variables"].extend(self._extract_variable_set_variables_data(variable_set))
+            skipped_entity_types = [
+                entity_type for entity_type in extractors if not self._needs_entity_type(entity_type)
+            ]
+            if len(skipped_entity_types) > 0:
+                logging.info(f"Skipping entity types that are not needed: {', '.join(skipped_entity_types)}")
+                extractors = {key: value for key, value in extractors.items() if key not in skipped_entity_types}
+
+            # Results are merged in organization order, regardless of completion order, so that the extracted data
+            # is identical whether or not the extraction runs concurrently
+            tasks = [(organization, entity_type) for organization in data.organizations for entity_type in extractors]
+            results = self._map_concurrently(
+                lambda task: self._extract_checkpointed_data(
+                    f"extract/{task[0].get('id')}/{task[1]}", extractors[task[1]], task[0]
+                ),
+                tasks,
+            )
+            for (_, entity_type), result in zip(tasks, results, strict=True):
+                data[entity_type].extend(result)
+
+            if self.experimental_support_variable_sets and self._needs_entity_type("variable_set_variables"):
+                variable_set_variables = self._map_concurrently(
+                    lambda variable_set: self._extract_checkpointed_data(
+                        f"extract/{variable_set.get('id')}/variables",
+                        self._extract_variable_set_variables_data,
+                        variable_set,
+                    ),
+                    data.variable_sets,
+                )
+                for result in variable_set_variables:
+                    data["variable_set_variables"].extend(result)
 
-        for workspace in data.workspaces:
-            data["workspace_variables"].extend(self._extract_workspace_variables_data(workspace))
+            if self._needs_entity_type("workspace_variables"):
+                data["workspace_variables"].extend(self._extract_all_workspace_variables_data(data))
 
-        logging.info("Stop extracting data")
+            logging.info("Stop extracting data")
 
-        return data
+            return data
+        finally:
+            self._extracting = False
+            self._previous_workspaces = None
 
-    def _extract_data_from_api(
+    def _extract_data_from_api(  # noqa: PLR0913
         self,
         path: str,
         drop_response_properties: list | None = None,
@@ -977,48 +1632,43 @@ class TerraformExporter(BaseExporter):
         method: str = "GET",
         properties: list | None = None,
         request_data: dict | None = None,
+        resource_type: str | None = None,
     ) -> list[dict]:
-        logging.debug("Start extracting data from API")
+        """Extract data from the Terraform API
 
-        if include_pattern is None:
-            include_pattern = ".*"
+        Args:
+            path (str): API path, relative to the API base URL
+            drop_response_properties (list | None): Response properties to drop before processing the response
+            include_pattern (str | None): Regex that entity names must match for the entities to be kept
+            method (str): HTTP method
+            properties (list | None): Properties to keep for each entity. All properties are kept if not set.
+            request_data (dict | None): Request payload
+            resource_type (str | None): JSON:API resource type for collections. When set, only the attributes and
+                relationships listed in the properties are requested from the API.
 
-        endpoint = self._config.get("api_endpoint", "https://app.terraform.io")
-        url = f"{endpoint}/api/v2{path}"
+        Returns:
+            list[dict]: Extracted entities
+        """
+        logging.debug("Start extracting data from API")
 
-        raw_data = []
-        while True:
+        if method == "GET":
+            data = list(
+                self._iter_data_from_api(
+                    path,
+                    drop_response_properties=drop_response_properties,
+                    include_pattern=include_pattern,
+                    properties=properties,
+                    resource_type=resource_type,
+                )
+            )
+        else:
             response_payload = self._call_api(
-                url, drop_response_properties=drop_response_properties, method=method, request_data=request_data
+                self._build_api_url(path),
+                drop_response_properties=drop_response_properties,
+                method=method,
+                request_data=request_data,
             )
-
-            if response_payload.get("data"):
-                if isinstance(response_payload["data"], dict):  # Individual resource
-                    raw_data.append(response_payload["data"])
-                else:  # Collection of resources
-                    raw_data.extend(response_payload["data"])
-
-            if response_payload.get("links.next"):
-                logging.debug("Pulling the next page from the API")
-                url = response_payload.get("links.next")
-            else:
-                break
-
-        include_regex = re.compile(include_pattern)
-
-        data = []
-        for raw_datum in raw_data:
-            if raw_datum.get("attributes.name") and include_regex.match(raw_datum.get("attributes.name")) is None:
-                continue
-
-            if properties:
-                # KLUDGE: There must be a cleaner way to handle this
-                datum = benedict()
-                for property_ in properties:
-                    datum[property_] = raw_datum.get(property_)
-                data.append(datum)
-            else:
-                data.append(raw_datum)
+            data = list(self._iter_response_data([response_payload], properties=properties))
 
         logging.debug("Stop extracting data from API")
 
@@ -1037,6 +1687,7 @@ class TerraformExporter(BaseExporter):
         data = self._extract_data_from_api(
             path=f"/organizations/{organization.get('id')}/agent-pools",
             properties=properties,
+            resource_type="agent-pools",
         )
 
         logging.info("Stop extracting agent pools data")
@@ -1051,17 +1702,40 @@ class TerraformExporter(BaseExporter):
             "attributes.namespace",
             "attributes.provider",
             "attributes.registry-name",
+            "attributes.updated-at",
             "id",
         ]
         list_data = self._extract_data_from_api(
             path=f"/organizations/{organization.get('id')}/registry-modules",
             properties=properties,
+            resource_type="registry-modules",
         )
 
-        data = []
-        for list_datum in list_data:
+        if self._sample_size is not None:
+            list_data = list_data[: self._sample_size]
+
+        cache = self._load_module_cache(organization.get("id"))
+        new_cache = {}
+
+        def extract_module_data(list_datum: dict) -> dict:
+            key = "/".join(
+                [
+                    list_datum.get("attributes.registry-name"),
+                    list_datum.get("attributes.namespace"),
+                    list_datum.get("attributes.name"),
+                    list_datum.get("attributes.provider"),
+                ]
+            )
+
+            # Modules that have not been updated since they were cached do not need to be pulled again
+            cache_entry = cache.get(key)
+            if cache_entry and cache_entry.get("updated_at") == list_datum.get("attributes.updated-at"):
+                logging.debug(f"Using cached data for module '{key}'")
+                new_cache[key] = cache_entry
+                return benedict(cache_entry.get("data"))
+
             module_data = self._extract_data_from_api(
-                path=f"/organizations/{organization.get('id')}/registry-modules/{list_datum.get('attributes.registry-name')}/{list_datum.get('attributes.namespace')}/{list_datum.get('attributes.name')}/{list_datum.get('attributes.provider')}",
+                path=f"/organizations/{organization.get('id')}/registry-modules/{key}",
                 properties=[
                     "attributes.name",
                     "attributes.provider",
@@ -1076,7 +1750,20 @@ class TerraformExporter(BaseExporter):
                 0
             ]  # KLUDE: There should be a way to pull single item from the API instead of a list of items
 
-            data.append(module_data)
+            new_cache[key] = {
+                "cached_at": time.time(),
+                "data": module_data,
+                "updated_at": list_datum.get("attributes.updated-at"),
+            }
+
+            return module_data
+
+        data = self._map_concurrently(extract_module_data, list_data)
+
+        if self.module_cache_ttl > 0:
+            path = Path(get_tmp_subfolder("cache/modules"), f"{organization.get('id')}.json")
+            with path.open("w", encoding="utf-8") as fp:
+                json.dump(new_cache, fp, default=json_default, indent=2, sort_keys=True)
 
         logging.info("Stop extracting modules data")
 
@@ -1085,15 +1772,95 @@ class TerraformExporter(BaseExporter):
     def _extract_organization_data(self) -> list[dict]:
         logging.info("Start extracting organizations data")
 
+        include_pattern = self._config.get("include.organizations")
+        path = "/organizations"
+
+        # The include pattern is pushed down to the API when possible, and still applied to the API response
+        search_term = self._get_name_search_term(include_pattern)
+        if search_term:
+            path = f"{path}?{urlencode({'q[name]': search_term})}"
+
         properties = ["attributes.email", "attributes.name", "id"]
         data = self._extract_data_from_api(
-            include_pattern=self._config.get("include.organizations"), path="/organizations", properties=properties
+            include_pattern=include_pattern,
+            path=path,
+            properties=properties,
+            resource_type="organizations",
         )
 
         logging.info("Stop extracting organizations data")
 
         return data
 
+    def _extract_organization_workspace_variables_data(self, organization: dict) -> dict | None:
+        """Extract the variables of all the workspaces in an organization at once
+
+        Args:
+            organization (dict): Organization
+
+        Returns:
+            dict | None: Workspace variables, grouped by workspace ID, or None if the API endpoint is not available
+        """
+        if not self._is_bulk_variable_extraction_supported(organization):
+            return None
+
+        logging.info("Start extracting organization workspace variables data")
+
+        query = urlencode({"filter[organization][name]": organization.get("attributes.name")})
+
+        data = {}
+        try:
+            response_payloads = self._iter_collection_pages(
+                f"/vars?{query}",
+                properties=[*self._workspace_variable_properties, "relationships.configurable.data.id"],
+                resource_type="vars",
+            )
+            for response_payload in response_payloads:
+                # Non-existent API endpoints return an empty dict instead of a list
+                if not isinstance(response_payload.get("data"), list):
+                    self._bulk_variable_unsupported_organization_ids.add(organization.get("id"))
+                    return None
+
+                for raw_datum in response_payload.get("data"):
+                    # The workspace relationship is named "configurable" on more recent API versions
+                    workspace_id = raw_datum.get("relationships.workspace.data.id") or raw_datum.get(
+                        "relationships.configurable.data.id"
+                    )
+                    raw_datum["relationships.workspace.data.id"] = workspace_id
+
+                    data.setdefault(workspace_id, []).append(
+                        self._project_datum(raw_datum, self._workspace_variable_properties)
+                    )
+        except TerraformExporterHTTPError as e:
+            # The documented API requires the workspace filter as well
+            if e.status_code not in [HTTPStatus.BAD_REQUEST, HTTPStatus.UNPROCESSABLE_ENTITY]:
+                raise
+
+            self._bulk_variable_unsupported_organization_ids.add(organization.get("id"))
+
+            return None
+
+        logging.info("Stop extracting organization workspace variables data")
+
+        return data
+
+    def _is_bulk_variable_extraction_supported(self, organization: dict) -> bool:
+        """Check whether the variables of all the workspaces in an organization should be listed at once
+
+        Listing variables with only an organization filter is not documented, so it is only attempted when enabled,
+        and at most once per organization if the Terraform API rejects it.
+
+        Args:
+            organization (dict): Organization
+
+        Returns:
+            bool: True if bulk variable extraction is enabled and has not been rejected for the organization
+        """
+        return (
+            self.bulk_variable_extraction
+            and organization.get("id") not in self._bulk_variable_unsupported_organization_ids
+        )
+
     def _extract_policies_data(self, organization: dict) -> list[dict]:
         logging.info("Start extracting policies data")
 
@@ -1108,6 +1875,7 @@ class TerraformExporter(BaseExporter):
         data = self._extract_data_from_api(
             path=f"/organizations/{organization.get('id')}/policies",
             properties=properties,
+            resource_type="policies",
         )
 
         logging.info("Stop extracting policies data")
@@ -1129,6 +1897,7 @@ class TerraformExporter(BaseExporter):
         data = self._extract_data_from_api(
             path=f"/organizations/{organization.get('id')}/policy-sets",
             properties=properties,
+            resource_type="policy-sets",
         )
 
         logging.info("Stop extracting policy sets data")
@@ -1146,6 +1915,7 @@ class TerraformExporter(BaseExporter):
         data = self._extract_data_from_api(
             path=f"/organizations/{organization.get('id')}/projects",
             properties=properties,
+            resource_type="projects",
         )
 
         logging.info("Stop extracting projects data")
@@ -1165,6 +1935,7 @@ class TerraformExporter(BaseExporter):
         data = self._extract_data_from_api(
             path=f"/organizations/{organization.get('id')}/registry-providers",
             properties=properties,
+            resource_type="registry-providers",
         )
 
         logging.info("Stop extracting providers data")
@@ -1186,6 +1957,7 @@ class TerraformExporter(BaseExporter):
         data = self._extract_data_from_api(
             path=f"/organizations/{organization.get('id')}/tasks",
             properties=properties,
+            resource_type="tasks",
         )
 
         logging.info("Stop extracting tasks data")
@@ -1204,6 +1976,7 @@ class TerraformExporter(BaseExporter):
         data = self._extract_data_from_api(
             path=f"/organizations/{organization.get('id')}/teams",
             properties=properties,
+            resource_type="teams",
         )
 
         logging.info("Stop extracting teams data")
@@ -1228,126 +2001,419 @@ class TerraformExporter(BaseExporter):
         data = self._extract_data_from_api(
             path=f"/organizations/{organization.get('id')}/varsets",
             properties=properties,
+            resource_type="varsets",
+        )
+
+        logging.info("Stop extracting variable sets data")
+
+        return data
+
+    def _extract_variable_set_variables_data(self, variable_set: dict) -> list[dict]:
+        logging.info("Start extracting variable set variables data")
+
+        properties = [
+            "attributes.category",
+            "attributes.description",
+            "attributes.hcl",
+            "attributes.key",
+            "attributes.sensitive",
+            "attributes.value",
+            "id",
+            "relationships.varset.data.id",
+        ]
+        data = self._extract_data_from_api(
+            path=f"/varsets/{variable_set.get('id')}/relationships/vars",
+            properties=properties,
+            resource_type="vars",
+        )
+
+        logging.info("Stop extracting variable set variables data")
+
+        return data
+
+    def _extract_workspace_variables_data(self, workspace: dict) -> list[dict]:
+        logging.info("Start extracting workspace variables data")
+
+        data = self._extract_data_from_api(
+            path=f"/workspaces/{workspace.get('id')}/vars",
+            properties=self._workspace_variable_properties,
+            resource_type="vars",
+        )
+
+        logging.info("Stop extracting workspace variables data")
+
+        return data
+
+    def _extract_workspace_variables_data_in_bulk(self, data: dict, workspaces: list[dict]) -> list[list[dict]]:
+        variables = {}
+
+        # Only the organizations owning at least one of the workspaces are queried
+        organization_ids = {workspace.get("relationships.organization.data.id") for workspace in workspaces}
+        organizations = [
+            organization for organization in data.organizations if organization.get("id") in organization_ids
+        ]
+
+        organization_variables = self._map_concurrently(
+            self._extract_organization_workspace_variables_data, organizations
+        )
+        for organization, organization_variables_data in zip(organizations, organization_variables, strict=True):
+            if organization_variables_data is not None:
+                variables.update(organization_variables_data)
+                continue
+
+            logging.warning(
+                f"Could not extract the workspace variables for the '{organization.get('id')}' organization at once. "
+                "Falling back to extracting them workspace by workspace."
+            )
+            organization_workspaces = [
+                workspace
+                for workspace in workspaces
+                if workspace.get("relationships.organization.data.id") == organization.get("id")
+            ]
+            workspace_variables = self._map_concurrently(
+                self._extract_checkpointed_workspace_variables_data, organization_workspaces
+            )
+            for workspace, workspace_variables_data in zip(organization_workspaces, workspace_variables, strict=True):
+                variables[workspace.get("id")] = workspace_variables_data
+
+        # Variables are returned in workspace order, and variables for other workspaces are dropped
+        return [variables.get(workspace.get("id"), []) for workspace in workspaces]
+
+    def _extract_workspaces_data(self, organization: dict) -> list[dict]:
+        logging.info("Start extracting workspaces data")
+
+        properties = [
+            "attributes.auto-apply",
+            "attributes.description",
+            "attributes.latest-change-at",
+            "attributes.name",
+            "attributes.resource-count",
+            "attributes.tag-names",
+            "attributes.terraform-version",
+            "attributes.updated-at",
+            "attributes.vcs-repo.branch",
+            "attributes.vcs-repo.identifier",
+            "attributes.vcs-repo.service-provider",
+            "attributes.working-directory",
+            "id",
+            "relationships.current-configuration-version.data.id",
+            "relationships.current-state-version.data.id",
+            "relationships.organization.data.id",
+            "relationships.project.data.id",
+        ]
+        include_pattern = self._config.get("include.workspaces")
+        path = f"/organizations/{organization.get('id')}/workspaces"
+
+        # The include pattern is pushed down to the API when possible, and still applied to the API response
+        search_term = self._get_name_search_term(include_pattern)
+        if search_term:
+            path = f"{path}?{urlencode({'search[name]': search_term})}"
+
+        data = self._extract_data_from_api(
+            include_pattern=include_pattern,
+            path=path,
+            properties=properties,
+            resource_type="workspaces",
+        )
+
+        if self._sample_size is not None:
+            data = data[: self._sample_size]
+
+        # Tag names are part of the list response, except on older Terraform Enterprise versions,
+        # in which case they have to be pulled for each workspace individually, unless they did not change.
+        unchanged_workspaces = self._get_unchanged_workspaces(data)
+        for datum in data:
+            if datum.get("attributes.tag-names") is None and datum.get("id") in unchanged_workspaces:
+                logging.debug(f"Reusing the tag names of the unchanged '{datum.get('id')}' workspace")
+                datum["attributes.tag-names"] = unchanged_workspaces[datum.get("id")].get("attributes.tag-names")
+
+        workspaces_without_tag_names = [datum for datum in data if datum.get("attributes.tag-names") is None]
+        if workspaces_without_tag_names:
+            logging.debug(f"Pulling tag names for {len(workspaces_without_tag_names)} workspace(s)")
+
+            def extract_tag_names(workspace: dict) -> list | None:
+                workspace_data = self._extract_data_from_api(
+                    path=f"/workspaces/{workspace.get('id')}",
+                    properties=["attributes.tag-names"],
+                )
+
+                return workspace_data[0].get("attributes.tag-names") if workspace_data else None
+
+            tag_names = self._map_concurrently(extract_tag_names, workspaces_without_tag_names)
+            for workspace, workspace_tag_names in zip(workspaces_without_tag_names, tag_names, strict=True):
+                workspace["attributes.tag-names"] = workspace_tag_names
+
+        logging.info("Stop extracting workspaces data")
+
+        return data
+
+    def _generate_migration_id(self, *args: str) -> str:
+        result = slugify("_".join(args)).replace("-", "_")
+        # Terraform resource names must start with a letter or underscore
+        if result and result[0].isdigit():
+            result = "_" + result
+        return result
+
+    def _get_unchanged_workspaces(self, workspaces: list[dict]) -> dict:
+        """Find the workspaces that did not change since the previous export, when running an incremental export
+
+        Args:
+            workspaces (list[dict]): Freshly extracted workspaces
+
+        Returns:
+            dict: Workspaces saved by the previous export, indexed by ID
+        """
+        if self._previous_data is None:
+            return {}
+
+        with self._previous_workspaces_lock:
+            if self._previous_workspaces is None:
+                self._previous_workspaces = {
+                    workspace.get("id"): benedict(workspace) for workspace in self._previous_data.get("workspaces", [])
+                }
+
+        unchanged_workspaces = {}
+        for workspace in workspaces:
+            previous_workspace = self._previous_workspaces.get(workspace.get("id"))
+            if previous_workspace is None or workspace.get("attributes.updated-at") is None:
+                continue
+
+            if all(
+                workspace.get(f"attributes.{name}") == previous_workspace.get(f"attributes.{name}")
+                for name in ["latest-change-at", "updated-at"]
+            ):
+                unchanged_workspaces[workspace.get("id")] = previous_workspace
+
+        return unchanged_workspaces
+
+    def _get_cache_entry(self, url: str, method: str = "GET") -> tuple[dict | None, str | None]:
+        """Look up a response in the response cache, which is only used for GET requests while extracting data
+
+        Args:
+            url (str): URL
+            method (str): HTTP method
+
+        Returns:
+            tuple[dict | None, str | None]: Cache entry, if any, and cache key, if the response can be cached
+        """
+        if method != "GET" or not self._extracting or self._response_cache is None:
+            return None, None
+
+        # Incremental exports compare the workspaces' timestamps with the previous export, so the workspace listing
+        # must be fresh, and cached responses that cannot be revalidated may not be
+        if self._previous_data is not None and re.search(r"/organizations/[^/]+/workspaces$", urlsplit(url).path):
+            return None, None
+
+        cache_key = f"{self._api_token_fingerprint}:{url}"
+
+        return self._response_cache.get(cache_key), cache_key
+
+    def _get_cached_response_body(self, url: str) -> str | None:
+        """Return the body of a GET response, from the response cache if possible
+
+        Args:
+            url (str): URL
+
+        Returns:
+            str | None: Response body, or None if the API endpoint does not exist
+        """
+        cache_entry, cache_key = self._get_cache_entry(url)
+        if cache_entry and not cache_entry.get("etag") and not cache_entry.get("last_modified"):
+            # Entries that cannot be revalidated are used as is until they expire
+            logging.debug("Using cached response")
+            return cache_entry.get("body")
+
+        return self._get_response_body(url, cache_entry=cache_entry, cache_key=cache_key)
+
+    def _get_remaining_page_urls(self, response_payload: dict) -> list[str]:
+        """Build the URLs of the pages following the first one, based on the JSON:API pagination metadata
+
+        Args:
+            response_payload (dict): Response payload for the first page of a collection
+
+        Returns:
+            list[str]: URLs of the remaining pages, or an empty list if they have to be pulled one by one
+        """
+        next_url = response_payload.get("links.next")
+        total_pages = response_payload.get("meta.pagination.total-pages")
+        if not next_url or not total_pages:
+            return []
+
+        parsed_url = urlsplit(next_url)
+        query = parse_qsl(parsed_url.query, keep_blank_values=True)
+        if "page[number]" not in dict(query):
+            return []
+
+        current_page = response_payload.get("meta.pagination.current-page", 1)
+
+        urls = []
+        for page_number in range(current_page + 1, total_pages + 1):
+            page_query = [(key, str(page_number) if key == "page[number]" else value) for key, value in query]
+            urls.append(urlunsplit(parsed_url._replace(query=urlencode(page_query))))
+
+        return urls
+
+    def _create_session(
+        self, pool_size: int | None = None, max_retries: int | None = None  # noqa: ARG002
+    ) -> requests.Session:
+        # Requests are retried by _send_request, within the rate limits, instead of by the session
+        session = super()._create_session(
+            max_retries=0, pool_size=self.api_pool_size if pool_size is None else pool_size
+        )
+        session.headers.update(
+            {
+                "Authorization": f"Bearer {self._config.get('api_token')}",
+                "Content-Type": "application/vnd.api+json",
+            }
         )
 
-        logging.info("Stop extracting variable sets data")
+        return session
+
+    def _get_response_body(
+        self,
+        url: str,
+        cache_entry: dict | None = None,
+        cache_key: str | None = None,
+        method: str = "GET",
+        request_data: dict | None = None,
+    ) -> str | None:
+        """Send a request to the Terraform API and return the response body
+
+        Args:
+            url (str): URL
+            cache_entry (dict | None): Cached response to revalidate
+            cache_key (str | None): Key to store the response under in the response cache, if any
+            method (str): HTTP method
+            request_data (dict | None): Request payload
+
+        Returns:
+            str | None: Response body, or None if the API endpoint does not exist
+        """
+        if request_data is not None:
+            request_data = json.dumps(request_data)
+
+        with self._translate_request_errors(url):
+            response = self._send_request(
+                data=request_data, headers=self._build_conditional_headers(cache_entry), method=method, url=url
+            )
+
+        return self._read_response_body(url, response, cache_entry=cache_entry, cache_key=cache_key)
 
-        return data
+    def _read_response_body(
+        self, url: str, response: requests.Response, cache_entry: dict | None = None, cache_key: str | None = None
+    ) -> str | None:
+        """Check a Terraform API response and return its body
 
-    def _extract_variable_set_variables_data(self, variable_set: dict) -> list[dict]:
-        logging.info("Start extracting variable set variables data")
+        Args:
+            url (str): URL
+            response (requests.Response): Response
+            cache_entry (dict | None): Cached response that was revalidated, if any
+            cache_key (str | None): Key to store the response under in the response cache, if any
 
-        properties = [
-            "attributes.category",
-            "attributes.description",
-            "attributes.hcl",
-            "attributes.key",
-            "attributes.sensitive",
-            "attributes.value",
-            "id",
-            "relationships.varset.data.id",
-        ]
-        data = self._extract_data_from_api(
-            path=f"/varsets/{variable_set.get('id')}/relationships/vars",
-            properties=properties,
-        )
+        Returns:
+            str | None: Response body, or None if the API endpoint does not exist
+        """
+        logging.debug(request_dump.dump_all(response).decode("utf-8"))
 
-        logging.info("Stop extracting variable set variables data")
+        if response.status_code == HTTPStatus.NOT_FOUND:
+            return None
 
-        return data
+        with self._translate_request_errors(url):
+            response.raise_for_status()
 
-    def _extract_workspace_variables_data(self, workspace: dict) -> list[dict]:
-        logging.info("Start extracting workspace variables data")
+        if cache_entry and response.status_code == HTTPStatus.NOT_MODIFIED:
+            logging.debug("Using revalidated cached response")
+            self._response_cache.set(
+                cache_key,
+                cache_entry.get("body"),
+                etag=response.headers.get("ETag", cache_entry.get("etag")),
+                last_modified=response.headers.get("Last-Modified", cache_entry.get("last_modified")),
+            )
 
-        properties = [
-            "attributes.category",
-            "attributes.description",
-            "attributes.hcl",
-            "attributes.key",
-            "attributes.sensitive",
-            "attributes.value",
-            "id",
-            "relationships.workspace.data.id",
-        ]
-        data = self._extract_data_from_api(
-            path=f"/workspaces/{workspace.get('id')}/vars",
-            properties=properties,
-        )
+            return cache_entry.get("body")
 
-        logging.info("Stop extracting workspace variables data")
+        # JSON:API responses are always encoded in UTF-8
+        body = response.content.decode("utf-8")
 
-        return data
+        if cache_key and response.status_code == HTTPStatus.OK:
+            self._response_cache.set(
+                cache_key,
+                body,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
 
-    def _extract_workspaces_data(self, organization: dict) -> list[dict]:
-        logging.info("Start extracting workspaces data")
+        return body
 
-        properties = [
-            "attributes.auto-apply",
-            "attributes.description",
-            "attributes.name",
-            "attributes.resource-count",
-            "attributes.terraform-version",
-            "attributes.vcs-repo.branch",
-            "attributes.vcs-repo.identifier",
-            "attributes.vcs-repo.service-provider",
-            "attributes.working-directory",
-            "id",
-            "relationships.current-configuration-version.data.id",
-            "relationships.current-state-version.data.id",
-            "relationships.organization.data.id",
-            "relationships.project.data.id",
-        ]
-        data = self._extract_data_from_api(
-            include_pattern=self._config.get("include.workspaces"),
-            path=f"/organizations/{organization.get('id')}/workspaces",
-            properties=properties,
-        )
+    def _get_retry_delay(self, method: str, attempt: int, response: requests.Response | None = None) -> float | None:
+        """Determine how long to wait before retrying a request
 
-        # Get tag names for every stack and update the benedict with those tag names.
-        for i in data:
-            additional_properties = [
-                "attributes.tag-names"
-            ]
+        Args:
+            method (str): HTTP method
+            attempt (int): Number of attempts made so far, minus one
+            response (requests.Response | None): Response, or None if the request failed without one
 
-            additional_data = self._extract_data_from_api(
-                include_pattern=self._config.get("include.workspaces"),
-                path=f"/workspaces/{i.get('id')}",
-                properties=additional_properties,
-            )
+        Returns:
+            float | None: Number of seconds to wait, or None if the request should not be retried
+        """
+        if attempt >= self.api_max_retries:
+            return None
 
-            i["attributes.tag-names"] = additional_data[0].get("attributes.tag-names")
+        backoff = min(60, 2**attempt) * random.uniform(0.5, 1)
 
-        logging.info("Stop extracting workspaces data")
+        if response is not None and response.status_code in [
+            HTTPStatus.TOO_MANY_REQUESTS,
+            HTTPStatus.SERVICE_UNAVAILABLE,
+        ]:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is None:
+                retry_after = parse_retry_after(response.headers.get("X-RateLimit-Reset"))
+            if retry_after is not None:
+                backoff = retry_after
 
-        return data
+        # Rate limited requests have not been processed, so they can be retried regardless of the method
+        if response is not None and response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+            return backoff
 
-    def _find_entity(self, data: list[dict], id_: str) -> dict | None:
-        logging.debug(f"Start searching for entity ({id_})")
+        # Other failed requests, including 503 responses from a proxy, may have been processed
+        if method.upper() not in ["GET", "HEAD", "OPTIONS"]:
+            return None
 
-        entity = None
-        for datum in data:
-            if datum.get("id") == id_:
-                entity = datum
-                break
+        if response is None or response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+            return backoff
 
-        logging.debug(f"Stop searching for entity ({id_})")
+        return None
 
-        return entity
+    def _get_name_search_term(self, pattern: str | None) -> str | None:
+        """Find a literal that every name matching an include pattern contains, to filter names server-side
 
-    def _generate_migration_id(self, *args: str) -> str:
-        result = slugify("_".join(args)).replace("-", "_")
-        # Terraform resource names must start with a letter or underscore
-        if result and result[0].isdigit():
-            result = "_" + result
-        return result
+        Only simple patterns are supported: a literal prefix (e.g. "^prod-.*$"), a literal substring
+        (e.g. ".*prod.*") or an exact name (e.g. "^my-org$"). Escaped punctuation is allowed in the literal.
+
+        Args:
+            pattern (str | None): Include pattern, matched from the start of the names
+
+        Returns:
+            str | None: Literal to search names for, or None if the pattern is not simple enough
+        """
+        if not pattern:
+            return None
+
+        match = re.fullmatch(r"\^?(?:\.\*)?((?:[^\\.^$*+?{}\[\]|()]|\\[^A-Za-z0-9])+)(?:\.\*)?\$?", pattern)
+        if match is None:
+            return None
+
+        return re.sub(r"\\(.)", r"\1", match.group(1))
 
     def _get_plan(self, id_: str) -> dict:
         while True:
-            data = self._extract_data_from_api(
-                path=f"/plans/{id_}", properties=["attributes.log-read-url", "attributes.status"]
-            )[
-                0
-            ]  # KLUDGE: There should be a way to pull single item from the API instead of a list of items
+            # Not memoized, as the plan status changes without any request from the exporter
+            response_payload = self._call_api(self._build_api_url(f"/plans/{id_}"), memoize=False)
+            data = list(  # noqa: RUF015
+                self._iter_response_data(
+                    [response_payload], properties=["attributes.log-read-url", "attributes.status"]
+                )
+            )[0]  # KLUDGE: There should be a way to pull single item from the API instead of a list of items
 
             if data.get("attributes.status") in ["errored", "finished"]:
                 break
@@ -1361,24 +2427,222 @@ class TerraformExporter(BaseExporter):
 
         return data
 
-    def _map_context_variables_data(self, src_data: dict) -> dict:
-        def find_variable_set(data: dict, variable_set_id: str) -> dict:
-            for variable_set in data.get("variable_sets"):
-                if variable_set.get("id") == variable_set_id:
-                    return variable_set
+    def _invalidate_memoized_responses(self, url: str) -> None:
+        """Forget the memoized responses that a mutating request may have made stale
 
-            logging.warning(f"Could not find variable set '{variable_set_id}'")
+        These are the responses for the resource itself and its sub-resources (e.g. "/workspaces/ws-123/vars" for
+        "/workspaces/ws-123"), and for the collections of the same resource type (e.g.
+        "/organizations/my-org/workspaces").
 
-            return None
+        Args:
+            url (str): URL of the mutating request
+        """
+        path = urlsplit(url).path.rstrip("/")
+        resource_type = path.removeprefix(urlsplit(self._build_api_url("")).path).strip("/").split("/")[0]
+
+        def is_stale(memoized_url: str) -> bool:
+            memoized_path = urlsplit(memoized_url).path.rstrip("/")
+
+            return (
+                memoized_path == path
+                or memoized_path.startswith(f"{path}/")
+                or memoized_path.rsplit("/", 1)[-1] == resource_type
+            )
+
+        self._request_memo.invalidate(is_stale)
+
+    def _load_module_cache(self, organization_id: str) -> dict:
+        """Load the cached module data that is still within its time to live
+
+        Args:
+            organization_id (str): Organization ID
+
+        Returns:
+            dict: Cache entries, keyed by "registry-name/namespace/name/provider"
+        """
+        if self.module_cache_ttl <= 0:
+            return {}
+
+        path = Path(get_tmp_subfolder("cache/modules"), f"{organization_id}.json")
+        if not path.exists():
+            return {}
+
+        with path.open("r", encoding="utf-8") as fp:
+            cache = json.load(fp)
+
+        now = time.time()
+
+        return {key: entry for key, entry in cache.items() if now - entry.get("cached_at", 0) < self.module_cache_ttl}
+
+    def _iter_collection_pages(
+        self,
+        path: str,
+        resource_type: str,
+        drop_response_properties: list | None = None,
+        properties: list | None = None,
+    ) -> Iterator[dict]:
+        """Pull the pages of a collection from the Terraform API, only requesting the given properties if possible
+
+        Args:
+            path (str): API path, relative to the API base URL
+            resource_type (str): JSON:API resource type
+            drop_response_properties (list | None): Response properties to drop before processing the response
+            properties (list | None): Properties to request for each entity
+
+        Yields:
+            dict: Response payloads, in page order
+        """
+        if not self.sparse_fieldsets:
+            yield from self._iter_pages(self._build_api_url(path), drop_response_properties=drop_response_properties)
+            return
+
+        response_payloads = self._iter_pages(
+            self._build_api_url(path, query=self._build_sparse_fieldset_query(properties, resource_type)),
+            drop_response_properties=drop_response_properties,
+        )
+        try:
+            response_payload = next(response_payloads)
+        except TerraformExporterHTTPError as e:
+            if e.status_code != HTTPStatus.BAD_REQUEST:
+                raise
 
+            response_payloads = self._iter_pages(
+                self._build_api_url(path), drop_response_properties=drop_response_properties
+            )
+            response_payload = next(response_payloads)
+
+            # Only disable sparse fieldsets if the request succeeded without them
+            logging.warning("The Terraform API does not support sparse fieldsets. Disabling them.")
+            self.sparse_fieldsets = False
+
+        yield response_payload
+        yield from response_payloads
+
+    def _iter_data_from_api(
+        self,
+        path: str,
+        drop_response_properties: list | None = None,
+        include_pattern: str | None = None,
+        properties: list | None = None,
+        resource_type: str | None = None,
+    ) -> Iterator[dict]:
+        """Stream entities from the Terraform API
+
+        Entities are filtered and projected as each page arrives, so that the full API resources are only held in
+        memory for the pages being processed or prefetched, instead of the whole collection.
+
+        Args:
+            path (str): API path, relative to the API base URL
+            drop_response_properties (list | None): Response properties to drop before processing the response
+            include_pattern (str | None): Regex that entity names must match for the entities to be kept
+            properties (list | None): Properties to keep for each entity. All properties are kept if not set.
+            resource_type (str | None): JSON:API resource type for collections. When set, only the attributes and
+                relationships listed in the properties are requested from the API.
+
+        Yields:
+            dict: Extracted entities
+        """
+        if resource_type:
+            response_payloads = self._iter_collection_pages(
+                path,
+                drop_response_properties=drop_response_properties,
+                properties=properties,
+                resource_type=resource_type,
+            )
+        else:
+            response_payloads = self._iter_pages(
+                self._build_api_url(path), drop_response_properties=drop_response_properties
+            )
+
+        yield from self._iter_response_data(response_payloads, include_pattern=include_pattern, properties=properties)
+
+    def _iter_pages(self, url: str, drop_response_properties: list | None = None) -> Iterator[dict]:
+        """Pull the pages of a collection from the Terraform API
+
+        Once the first page has been pulled, the following ones are prefetched concurrently when the pagination
+        metadata allows it, within a window that bounds the number of pages held in memory.
+
+        Args:
+            url (str): URL of the first page
+            drop_response_properties (list | None): Response properties to drop before processing the response
+
+        Yields:
+            dict: Response payloads, in page order
+        """
+        # Single resources are memoized, but collections are only known to be collections once pulled
+        response_payload = self._call_api_for_page(url, drop_response_properties=drop_response_properties, memoize=True)
+        if isinstance(response_payload.get("data"), list):
+            self._request_memo.invalidate(lambda memoized_url: memoized_url == url)
+        yield response_payload
+
+        window = self.pagination_workers
+        page_urls = self._get_remaining_page_urls(response_payload) if window > 1 else []
+        if page_urls:
+            logging.debug(f"Pulling the {len(page_urls)} remaining pages from the API, {window} at a time")
+
+            with ThreadPoolExecutor(max_workers=window) as executor:
+
+                futures = deque()
+                for page_url in page_urls:
+                    futures.append(
+                        executor.submit(
+                            self._call_api_for_page, page_url, drop_response_properties=drop_response_properties
+                        )
+                    )
+                    if len(futures) >= window:
+                        yield futures.popleft().result()
+
+                while futures:
+                    yield futures.popleft().result()
+        else:
+            # Without pagination metadata (e.g. older Terraform Enterprise versions), pages are pulled one by one
+            while response_payload.get("links.next"):
+                logging.debug("Pulling the next page from the API")
+                response_payload = self._call_api_for_page(
+                    response_payload.get("links.next"), drop_response_properties=drop_response_properties
+                )
+                yield response_payload
+
+    def _iter_response_data(
+        self, response_payloads: Iterable[dict], include_pattern: str | None = None, properties: list | None = None
+    ) -> Iterator[dict]:
+        """Filter and project the entities of API responses
+
+        Args:
+            response_payloads (Iterable[dict]): Response payloads
+            include_pattern (str | None): Regex that entity names must match for the entities to be kept
+            properties (list | None): Properties to keep for each entity. All properties are kept if not set.
+
+        Yields:
+            dict: Entities
+        """
+        include_regex = re.compile(include_pattern if include_pattern is not None else ".*")
+
+        for response_payload in response_payloads:
+            if not response_payload.get("data"):
+                continue
+
+            if isinstance(response_payload["data"], dict):  # Individual resource
+                raw_data = [response_payload["data"]]
+            else:  # Collection of resources
+                raw_data = response_payload["data"]
+
+            for raw_datum in raw_data:
+                if raw_datum.get("attributes.name") and include_regex.match(raw_datum.get("attributes.name")) is None:
+                    continue
+
+                yield self._project_datum(raw_datum, properties)
+
+    @consumes("variable_set_variables", "variable_sets", stage="map")
+    def _map_context_variables_data(self, src_data: dict) -> dict:
         logging.info("Start mapping context variables data")
 
         prog = re.compile("^[a-zA-Z_]+[a-zA-Z0-9_]*$")
         data = []
         for variable in src_data.get("variable_set_variables"):
-            variable_set = find_variable_set(
-                data=src_data, variable_set_id=variable.get("relationships.varset.data.id")
-            )
+            variable_set = self._get_entity(src_data, "variable_sets", variable.get("relationships.varset.data.id"))
+            if variable_set is None:
+                logging.warning(f"Could not find variable set '{variable.get('relationships.varset.data.id')}'")
 
             is_name_valid = True
 
@@ -1452,6 +2716,7 @@ class TerraformExporter(BaseExporter):
 
         return data
 
+    @consumes("variable_sets", stage="map")
     def _map_contexts_data(self, src_data: dict) -> dict:
         logging.info("Start mapping contexts data")
 
@@ -1531,6 +2796,7 @@ class TerraformExporter(BaseExporter):
 
         return data
 
+    @consumes("modules", stage="map")
     def _map_modules_data(self, src_data: dict) -> dict:
         logging.info("Start mapping modules data")
 
@@ -1588,6 +2854,7 @@ class TerraformExporter(BaseExporter):
 
         return data
 
+    @consumes("organizations", "projects", stage="map")
     def _map_spaces_data(self, src_data: dict) -> dict:
         logging.info("Start mapping spaces data")
 
@@ -1616,22 +2883,16 @@ class TerraformExporter(BaseExporter):
 
         return data
 
+    @consumes("workspace_variables", "workspaces", stage="map")
     def _map_stack_variables_data(self, src_data: dict) -> dict:
-        def find_workspace(data: dict, workspace_id: str) -> dict:
-            for workspace in data.get("workspaces"):
-                if workspace.get("id") == workspace_id:
-                    return workspace
-
-            logging.warning(f"Could not find workspace '{workspace_id}'")
-
-            return None
-
         logging.info("Start mapping stack variables data")
 
         prog = re.compile("^[a-zA-Z_]+[a-zA-Z0-9_]*$")
         data = []
         for variable in src_data.get("workspace_variables"):
-            workspace = find_workspace(data=src_data, workspace_id=variable.get("relationships.workspace.data.id"))
+            workspace = self._get_entity(src_data, "workspaces", variable.get("relationships.workspace.data.id"))
+            if workspace is None:
+                logging.warning(f"Could not find workspace '{variable.get('relationships.workspace.data.id')}'")
 
             is_name_valid = True
 
@@ -1704,35 +2965,20 @@ class TerraformExporter(BaseExporter):
 
         return {"vcs_namespace": vcs_namespace, "vcs_repository": vcs_repository, "provider": provider}
 
+    @consumes("workspace_variables", "workspaces", stage="map")
     def _map_stacks_data(self, src_data: dict) -> dict:
-        def find_workspace_variable_with_invalid_name(data: dict, workspace_id: str, type_: str = "plain") -> dict:
-            prog = re.compile("^[a-zA-Z_]+[a-zA-Z0-9_]*$")
-            variables = []
-
-            for variable in data.get("workspace_variables"):
-                if (variable.get("attributes.sensitive") is True and type_ == "plain") or (
-                    variable.get("attributes.sensitive") is False and type_ == "secret"
-                ):
-                    continue
-
-                if (
-                    variable.get("relationships.workspace.data.id") == workspace_id
-                    and re.search(prog, variable.get("attributes.key")) is None
-                ):
-                    variables.append(variable)
-                    continue
-
-            return variables
-
         logging.info("Start mapping stacks data")
 
+        # Variables with an invalid name are grouped by workspace and type in a single pass
+        variables_with_invalid_name_by_workspace = group_workspace_variables_with_invalid_name(src_data)
+
         data = []
         for workspace in src_data.get("workspaces"):
-            variables_with_invalid_name = find_workspace_variable_with_invalid_name(
-                data=src_data, type_="plain", workspace_id=workspace.get("id")
+            variables_with_invalid_name = variables_with_invalid_name_by_workspace.get(
+                (workspace.get("id"), "plain"), []
             )
-            secret_variables_with_invalid_name = find_workspace_variable_with_invalid_name(
-                data=src_data, type_="secret", workspace_id=workspace.get("id")
+            secret_variables_with_invalid_name = variables_with_invalid_name_by_workspace.get(
+                (workspace.get("id"), "secret"), []
             )
 
             vcs_info = self._determine_provider(workspace)
@@ -1786,6 +3032,7 @@ class TerraformExporter(BaseExporter):
 
         return data
 
+    @consumes(stage="map")
     def _map_data(self, src_data: dict) -> dict:
         logging.info("Start mapping data")
 
@@ -1813,20 +3060,11 @@ class TerraformExporter(BaseExporter):
         return data
 
     def _mark_spaces_for_terraform_custom_workflow(self, data: dict) -> dict:
-        def find_space(data: dict, id_: str) -> dict:
-            for space in data.get("spaces"):
-                if space.get("_source_id") == id_:
-                    return space
-
-            logging.warning(f"Could not find space '{id_}'")
-
-            return None
-
         logging.info("Start marking spaces for Terraform custom workflow")
 
         for stack in data.get("stacks"):
             if stack.get("terraform.workflow_tool") == "CUSTOM":
-                space = find_space(data, stack.get("_relationships.space"))
+                space = self._get_entity(data, "spaces", stack.get("_relationships.space"), id_keypath="_source_id")
                 if space:
                     space["requires_terraform_workflow_tool"] = True
                 else:
@@ -1836,6 +3074,95 @@ class TerraformExporter(BaseExporter):
 
         return data
 
+    def _send_request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request to the Terraform API, within the rate limits and with retries
+
+        Args:
+            method (str): HTTP method
+            url (str): URL
+            **kwargs: Additional arguments for requests.Session.request()
+
+        Returns:
+            requests.Response: Response
+        """
+        attempt = 0
+        while True:
+            response, delay = self._send_request_attempt(method, url, attempt, **kwargs)
+            if delay is None:
+                return response
+
+            time.sleep(delay)
+            attempt += 1
+
+    def _send_request_attempt(
+        self, method: str, url: str, attempt: int, **kwargs
+    ) -> tuple[requests.Response | None, float | None]:
+        """Send a request to the Terraform API once, within the rate limits
+
+        Args:
+            method (str): HTTP method
+            url (str): URL
+            attempt (int): Number of attempts made so far
+            **kwargs: Additional arguments for requests.Session.request()
+
+        Returns:
+            tuple[requests.Response | None, float | None]: Response, if any, and number of seconds to wait before
+                retrying the request, or None if it should not be retried
+        """
+        def send() -> requests.Response:
+            return self._get_session().request(method=method, timeout=self.api_timeout, url=url, **kwargs)
+
+        try:
+            with self._rate_limiter.limit():
+                if self._hedger is not None and method == "GET":
+                    # Only idempotent requests can be sent twice. Duplicates are only sent if the rate limits allow it
+                    # right away, and the hedging delay is measured on the server latency alone.
+                    response = self._hedger.call(
+                        send, discard=lambda response: response.close(), admit=self._rate_limiter.try_limit
+                    )
+                else:
+                    response = send()
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            delay = self._get_retry_delay(method=method, attempt=attempt)
+            if delay is None:
+                raise
+
+            logging.warning(f"Request to {url} failed ({e}). Retrying in {delay:.1f} seconds.")
+
+            return None, delay
+
+        self._rate_limiter.update(response.headers)
+
+        delay = self._get_retry_delay(method=method, attempt=attempt, response=response)
+        if delay is not None:
+            if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+                # Pause every thread, not only this one, until the rate limit is reset
+                self._rate_limiter.pause(delay)
+
+            logging.warning(
+                f"Request to {url} failed with HTTP status {response.status_code}. Retrying in {delay:.1f} seconds."
+            )
+
+        return response, delay
+
+    @contextmanager
+    def _translate_request_errors(self, url: str) -> Iterator[None]:
+        """Turn the errors raised by the HTTP client into exporter errors
+
+        Args:
+            url (str): URL
+        """
+        try:
+            yield
+        except requests.exceptions.HTTPError as e:
+            raise TerraformExporterHTTPError(e) from e
+        except requests.exceptions.ReadTimeout as e:
+            raise RuntimeError(f"Timeout for {url}") from e
+        except requests.exceptions.ConnectionError as e:
+            raise RuntimeError(f"Connection error for {url}") from e
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(f"Error for {url}") from e
+
     def _start_agent_container(
         self, agent_pool_id: str, container_name: str, worker_tempdir: str | None = None
     ) -> tuple[Container, str]:
@@ -1890,6 +3217,51 @@ class TerraformExporter(BaseExporter):
 
         return container, worker_tempdir
 
+    def _project_datum(self, raw_datum: dict, properties: list | None = None) -> dict:
+        if not properties:
+            return raw_datum
+
+        return Record(properties, [raw_datum.get(property_) for property_ in properties])
+
+    def _restore_pending_changes(self) -> None:
+        for workspace_id, backup in self._load_checkpoints("enrich/backups/").items():
+            workspace_data_backup = benedict(backup)
+            organization_id = workspace_data_backup.get("relationships.organization.data.id", "unknown")
+
+            logging.warning(f"Restoring workspace '{workspace_id}' left over by a previous export")
+            self._restore_workspace_exec_mode(organization_id, workspace_id, workspace_data_backup)
+            self._delete_checkpoint(f"enrich/backups/{workspace_id}")
+
+        for var_set_id, variable_set_relationship_backup in self._load_checkpoints(
+            "enrich/variable_set_backups/"
+        ).items():
+            logging.warning(f"Restoring variable set '{var_set_id}' left over by a previous export")
+            self._restore_variable_set_relationships(var_set_id, benedict(variable_set_relationship_backup))
+            self._delete_checkpoint(f"enrich/variable_set_backups/{var_set_id}")
+
+    def _restore_variable_set_relationships(self, var_set_id: str, variable_set_relationship_backup: dict) -> None:
+        logging.info(f"Restoring the '{var_set_id}' variable set relationships")
+
+        request = {}
+        if variable_set_relationship_backup.get("relationships.workspaces.data") is not None:
+            request["workspaces"] = {"data": variable_set_relationship_backup.get("relationships.workspaces.data")}
+        if variable_set_relationship_backup.get("relationships.projects.data") is not None:
+            request["projects"] = {"data": variable_set_relationship_backup.get("relationships.projects.data")}
+
+        self._extract_data_from_api(
+            method="PATCH",
+            path=f"/varsets/{var_set_id}",
+            request_data={
+                "data": {
+                    "attributes": {
+                        "priority": variable_set_relationship_backup.get("attributes.priority"),
+                        "global": variable_set_relationship_backup.get("attributes.global"),
+                    },
+                    "relationships": request
+                }
+            }
+        )
+
     def _restore_workspace_exec_mode(self, organization_id: str, workspace_id: str,
                                      workspace_data_backup: dict) -> None:
         logging.info(f"Restoring the '{organization_id}/{workspace_id}' workspace execution mode")
@@ -1910,6 +3282,22 @@ class TerraformExporter(BaseExporter):
             },
         )
 
+    def _use_agent_pool(self, workspace_id: str, agent_pool_id: str) -> None:
+        self._extract_data_from_api(
+            method="PATCH",
+            path=f"/workspaces/{workspace_id}",
+            request_data={
+                "data": {
+                    "attributes": {
+                        "agent-pool-id": agent_pool_id,
+                        "execution-mode": "agent",
+                        "setting-overwrites": {"execution-mode": True, "agent-pool": True},
+                    },
+                    "type": "workspaces",
+                }
+            },
+        )
+
     def _stop_agent_container(self, container: Container):
         if not container.exists() or not container.state.running:
             logging.warning(f"Local TFC/TFE agent '{container}' is already stopped before trying to stop it. Ignoring.")
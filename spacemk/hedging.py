@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import AbstractContextManager, nullcontext
+from typing import Any
+
+
+class Hedger:
+    """Send a duplicate of slow idempotent requests, and use whichever response arrives first
+
+    The duplicate is only sent once the original request has been in flight for longer than a percentile of the
+    latencies observed so far, so that only the slowest requests are hedged.
+    """
+
+    def __init__(self, max_workers: int, percentile: float = 95, min_samples: int = 20, window: int = 1000):
+        """Constructor
+
+        Args:
+            max_workers (int): Maximum number of requests in flight at the same time, including duplicates
+            percentile (float): Percentile of the observed latencies after which a duplicate request is sent
+            min_samples (int): Number of latencies to observe before hedging any request
+            window (int): Number of most recent latencies the percentile is computed from
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="spacemk-hedging")
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._min_samples = min_samples
+        self._percentile = percentile
+
+    def _get_delay(self) -> float | None:
+        with self._lock:
+            if len(self._latencies) < self._min_samples:
+                return None
+
+            latencies = sorted(self._latencies)
+
+        return latencies[min(len(latencies) - 1, int(len(latencies) * self._percentile / 100))]
+
+    def _observe(self, func: Callable[[], Any], admission: AbstractContextManager) -> Any:
+        with admission:
+            start = time.monotonic()
+            result = func()
+
+            with self._lock:
+                self._latencies.append(time.monotonic() - start)
+
+        return result
+
+    def call(
+        self,
+        func: Callable[[], Any],
+        discard: Callable[[Any], None] | None = None,
+        admit: Callable[[], AbstractContextManager | None] | None = None,
+    ) -> Any:
+        """Call a function, and call it again concurrently if it takes longer than usual
+
+        Only the function itself is timed, so any throttling should happen before calling this method, with admit()
+        deciding whether a duplicate can be sent.
+
+        Args:
+            func (Callable[[], Any]): Function sending an idempotent request
+            discard (Callable[[Any], None] | None): Function called with the result that arrived last, if any
+                (e.g. to release its connection)
+            admit (Callable[[], AbstractContextManager | None] | None): Function called before sending a duplicate,
+                returning a context manager held while the duplicate is in flight, or None to not send it (e.g. when
+                there is no rate limit budget left)
+
+        Returns:
+            Any: Result of the call that completed first. If both calls failed, the first error is raised.
+        """
+        delay = self._get_delay()
+        futures = [self._executor.submit(self._observe, func, nullcontext())]
+
+        done, _ = wait(futures, timeout=delay)
+        if not done:
+            admission = nullcontext() if admit is None else admit()
+            if admission is None:
+                logging.debug(f"Request still in flight after {delay:.3f} seconds, but a duplicate cannot be sent.")
+            else:
+                logging.debug(f"Request still in flight after {delay:.3f} seconds. Sending a duplicate request.")
+                futures.append(self._executor.submit(self._observe, func, admission))
+
+        def discard_result(future: Future) -> None:
+            if future.exception() is None:
+                discard(future.result())
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future.exception() is None:
+                    if discard is not None:
+                        for other_future in futures:
+                            if other_future is not future:
+                                other_future.add_done_callback(discard_result)
+
+                    return future.result()
+
+        # Every call failed
+        return futures[0].result()
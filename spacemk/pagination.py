@@ -0,0 +1,129 @@
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from requests.utils import parse_header_links
+
+
+def set_query_parameter(url: str, name: str, value: str | int) -> str:
+    """Set a query parameter in a URL, replacing its current value if any
+
+    Args:
+        url (str): URL
+        name (str): Query parameter name
+        value (str | int): Query parameter value
+
+    Returns:
+        str: Updated URL
+    """
+    parsed_url = urlsplit(url)
+    query = [(key, value_) for key, value_ in parse_qsl(parsed_url.query, keep_blank_values=True) if key != name]
+    query.append((name, str(value)))
+
+    return urlunsplit(parsed_url._replace(query=urlencode(query)))
+
+
+class Paginator(ABC):
+    """Strategy to walk through the pages of an API collection"""
+
+    def get_first_url(self, url: str) -> str:
+        """Build the URL of the first page
+
+        Args:
+            url (str): Collection URL
+
+        Returns:
+            str: URL of the first page
+        """
+        return url
+
+    @abstractmethod
+    def get_next_url(self, url: str, payload: dict, headers: Mapping) -> str | None:
+        """Build the URL of the next page
+
+        Args:
+            url (str): URL of the current page
+            payload (dict): Response payload for the current page
+            headers (Mapping): Response headers for the current page
+
+        Returns:
+            str | None: URL of the next page, or None if the current page is the last one
+        """
+        pass
+
+
+class LinkPaginator(Paginator):
+    """Follow the link to the next page, from the payload (e.g. "links.next" for JSON:API) or the Link header"""
+
+    def __init__(self, keypath: str | None = None):
+        """Constructor
+
+        Args:
+            keypath (str | None): Keypath of the next page link in the payload. The Link header is used if not set.
+        """
+        self._keypath = keypath
+
+    def get_next_url(self, url: str, payload: dict, headers: Mapping) -> str | None:  # noqa: ARG002
+        if self._keypath is not None:
+            return payload.get(self._keypath) or None
+
+        for link in parse_header_links(headers.get("Link", "")):
+            if link.get("rel") == "next":
+                return link.get("url")
+
+        return None
+
+
+class CursorPaginator(Paginator):
+    """Pass the cursor returned with each page as a query parameter to get the next one"""
+
+    def __init__(self, keypath: str, parameter: str = "cursor"):
+        """Constructor
+
+        Args:
+            keypath (str): Keypath of the next page cursor in the payload
+            parameter (str): Query parameter to pass the cursor in
+        """
+        self._keypath = keypath
+        self._parameter = parameter
+
+    def get_next_url(self, url: str, payload: dict, headers: Mapping) -> str | None:  # noqa: ARG002
+        cursor = payload.get(self._keypath)
+        if not cursor:
+            return None
+
+        return set_query_parameter(url, self._parameter, cursor)
+
+
+class OffsetPaginator(Paginator):
+    """Request pages of a fixed size at increasing offsets, until a page is not full"""
+
+    def __init__(
+        self, keypath: str, page_size: int = 100, offset_parameter: str = "offset", limit_parameter: str = "limit"
+    ):
+        """Constructor
+
+        Args:
+            keypath (str): Keypath of the list of items in the payload
+            page_size (int): Number of items per page
+            offset_parameter (str): Query parameter to pass the offset in
+            limit_parameter (str): Query parameter to pass the page size in
+        """
+        self._keypath = keypath
+        self._limit_parameter = limit_parameter
+        self._offset_parameter = offset_parameter
+        self._page_size = page_size
+
+    def get_first_url(self, url: str) -> str:
+        url = set_query_parameter(url, self._limit_parameter, self._page_size)
+
+        return set_query_parameter(url, self._offset_parameter, 0)
+
+    def get_next_url(self, url: str, payload: dict, headers: Mapping) -> str | None:  # noqa: ARG002
+        items = payload.get(self._keypath) or []
+        if len(items) < self._page_size:
+            return None
+
+        offset = int(dict(parse_qsl(urlsplit(url).query)).get(self._offset_parameter, 0))
+
+        return set_query_parameter(url, self._offset_parameter, offset + len(items))
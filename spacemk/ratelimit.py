@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from collections.abc import Iterator, Mapping
+from contextlib import AbstractContextManager, contextmanager
+from email.utils import parsedate_to_datetime
+
+_rate_limiters: dict = {}
+_rate_limiters_lock = threading.Lock()
+
+
+class RateLimiter:
+    """Client-side rate governor shared by all the threads calling the same API
+
+    Requests are throttled by a token bucket, whose size and refill rate follow the rate limit advertised by the API,
+    and by a cap on the number of requests in flight at the same time.
+    """
+
+    def __init__(self, rate: float, max_concurrency: int):
+        """Constructor
+
+        Args:
+            rate (float): Maximum number of requests per second
+            max_concurrency (int): Maximum number of requests in flight at the same time
+        """
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._rate = float(rate)
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._tokens = float(rate)
+        self._updated_at = time.monotonic()
+
+    def _take_token(self) -> float:
+        """Take a token from the bucket if there is one
+
+        Returns:
+            float: 0 if a token was taken, or the number of seconds to wait before one is available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._rate, self._tokens + (now - self._updated_at) * self._rate)
+            self._updated_at = now
+
+            if now < self._blocked_until:
+                return self._blocked_until - now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+
+            return (1 - self._tokens) / self._rate
+
+    def _acquire_token(self) -> None:
+        while (delay := self._take_token()) > 0:
+            time.sleep(delay)
+
+    @contextmanager
+    def limit(self) -> Iterator[None]:
+        """Wait until a request can be sent, and hold a concurrency slot while it is in flight"""
+        with self._semaphore:
+            self._acquire_token()
+            yield
+
+    def try_limit(self) -> AbstractContextManager | None:
+        """Reserve a concurrency slot and a token without waiting, e.g. for an optional duplicate request
+
+        Returns:
+            AbstractContextManager | None: Context manager holding the concurrency slot while the request is in flight,
+                or None if a request cannot be sent right away
+        """
+        if not self._semaphore.acquire(blocking=False):
+            return None
+
+        if self._take_token() > 0:
+            self._semaphore.release()
+            return None
+
+        @contextmanager
+        def release() -> Iterator[None]:
+            try:
+                yield
+            finally:
+                self._semaphore.release()
+
+        return release()
+
+    def pause(self, delay: float) -> None:
+        """Prevent any request from being sent for a while
+
+        Args:
+            delay (float): Number of seconds to wait before sending the next request
+        """
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+
+    def update(self, headers: Mapping) -> None:
+        """Adjust the token bucket to the rate limit headers returned by the API
+
+        Args:
+            headers (Mapping): Response headers
+        """
+        try:
+            rate = float(headers.get("X-RateLimit-Limit", 0))
+            remaining = float(headers.get("X-RateLimit-Remaining", 1))
+            reset = float(headers.get("X-RateLimit-Reset", 0))
+        except ValueError:
+            return
+
+        with self._lock:
+            if rate > 0 and rate != self._rate:
+                logging.debug(f"Adjusting the rate limit to {rate} requests per second")
+                self._rate = rate
+                self._tokens = min(self._tokens, rate)
+
+        if remaining <= 0 and reset > 0:
+            self.pause(reset)
+
+
+def get_rate_limiter(name: str, rate: float, max_concurrency: int) -> RateLimiter:
+    """Return the rate limiter shared by every call to an API in the current process
+
+    Args:
+        name (str): Unique name for the API (e.g. its endpoint)
+        rate (float): Initial maximum number of requests per second
+        max_concurrency (int): Maximum number of requests in flight at the same time
+
+    Returns:
+        RateLimiter: Shared rate limiter
+    """
+    with _rate_limiters_lock:
+        if name not in _rate_limiters:
+            _rate_limiters[name] = RateLimiter(rate=rate, max_concurrency=max_concurrency)
+
+        return _rate_limiters[name]
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse the value of a Retry-After header
+
+    Args:
+        value (str | None): Header value, either a number of seconds or an HTTP date
+
+    Returns:
+        float | None: Number of seconds to wait, or None if the value is missing or invalid
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,133 @@
+import copy
+import threading
+from typing import Any
+
+from benedict import benedict
+
+_MISSING = object()
+
+_schemas: dict = {}
+_schemas_lock = threading.Lock()
+
+
+class Record:
+    """Compact entity holding values for a fixed list of keypaths (e.g. "attributes.name")
+
+    Records extracted with the same list of properties share their keypath index, and only store their values, so
+    that looking up a property is a single dict lookup instead of a keypath traversal. Records keep the subset of
+    the benedict interface used on extracted entities.
+    """
+
+    __slots__ = ("_index", "_values")
+
+    def __init__(self, keypaths: tuple | list, values: list):
+        """Constructor
+
+        Args:
+            keypaths (tuple | list): Keypaths, separated with "."
+            values (list): Values, in the same order as the keypaths
+        """
+        self._index = _get_index(tuple(keypaths))
+        self._values = list(values)
+
+    def __contains__(self, keypath: str) -> bool:
+        return self.get(keypath, _MISSING) is not _MISSING
+
+    def __deepcopy__(self, memo: dict) -> "Record":
+        return Record(tuple(self._index), copy.deepcopy(self._values, memo))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Record):
+            return self.to_dict() == other.to_dict()
+
+        if isinstance(other, dict):
+            return self.to_dict() == other
+
+        return NotImplemented
+
+    def __getitem__(self, keypath: str) -> Any:
+        value = self.get(keypath, _MISSING)
+        if value is _MISSING:
+            raise KeyError(keypath)
+
+        return value
+
+    def __repr__(self) -> str:
+        return f"Record({self.to_dict()!r})"
+
+    def __setitem__(self, keypath: str, value: Any) -> None:
+        position = self._index.get(keypath)
+        if position is None:
+            # Indexes are shared between records, so adding a keypath switches this record to a new index
+            self._index = _get_index((*self._index, keypath))
+            self._values.append(value)
+        else:
+            self._values[position] = value
+
+    __hash__ = None
+
+    def get(self, keypath: str, default: Any = None) -> Any:
+        """Retrieve a value
+
+        Args:
+            keypath (str): Keypath, separated with "."
+            default (Any): Value returned if there is no value for the keypath
+
+        Returns:
+            Any: Value. Nested values are returned as a benedict when the keypath is a prefix of the record keypaths.
+        """
+        position = self._index.get(keypath)
+        if position is not None:
+            return self._values[position]
+
+        # Slow path, for keypaths pointing inside a value or to a group of values
+        value = benedict(self.to_dict()).get(keypath, _MISSING)
+
+        return default if value is _MISSING else value
+
+    def to_dict(self) -> dict:
+        """Convert the record to nested dicts, as a benedict would be serialized
+
+        Returns:
+            dict: Nested dicts
+        """
+        result = {}
+        for keypath, value in zip(self._index, self._values, strict=True):
+            *parents, key = keypath.split(".")
+
+            node = result
+            for parent in parents:
+                if not isinstance(node.get(parent), dict):
+                    node[parent] = {}
+                node = node[parent]
+
+            node[key] = value
+
+        return result
+
+
+def _get_index(keypaths: tuple) -> dict:
+    index = _schemas.get(keypaths)
+    if index is not None:
+        return index
+
+    with _schemas_lock:
+        if keypaths not in _schemas:
+            _schemas[keypaths] = {keypath: position for position, keypath in enumerate(keypaths)}
+
+        return _schemas[keypaths]
+
+
+def json_default(value: Any) -> Any:
+    """Serialize records with json.dump()
+
+    Args:
+        value (Any): Value that cannot be serialized by default
+
+    Returns:
+        Any: Serializable value
+    """
+    if isinstance(value, Record):
+        return value.to_dict()
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -20,18 +20,25 @@ class Spacelift:
         """
         self._config = config
         self._api_jwt_token = None
+        self._api_timeout = (
+            self._config.get("api.connect_timeout", 10),
+            self._config.get("api.read_timeout", 60),
+        )
 
     def call_api(self, operation: str, variables: dict | None = None) -> dict:
         try:
             response = requests.post(
                 headers={"Authorization": f"Bearer {self._get_api_jwt_token()}"},
                 json={"query": operation, "variables": variables},
+                timeout=self._api_timeout,
                 url=self._config.get("api.api_key_endpoint"),
             )
             logging.debug(request_dump.dump_all(response).decode("utf-8"))
             response.raise_for_status()
         except requests.exceptions.HTTPError as e:
             raise RuntimeError(f"HTTP Error: {e}") from e
+        except requests.exceptions.Timeout as e:
+            raise RuntimeError(f"Timeout Error: {e}") from e
 
         data = benedict(response.json())
 
@@ -57,10 +64,15 @@ class Spacelift:
                 },
             }
 
-            response = requests.post(
-                json=payload,
-                url=self._config.get("api.api_key_endpoint"),
-            )
+            try:
+                response = requests.post(
+                    json=payload,
+                    timeout=self._api_timeout,
+                    url=self._config.get("api.api_key_endpoint"),
+                )
+            except requests.exceptions.Timeout as e:
+                raise RuntimeError(f"Timeout Error: {e}") from e
+
             data = benedict(response.json())
 
             if "errors" in data:
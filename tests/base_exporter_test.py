@@ -0,0 +1,134 @@
+"""Tests for the base exporter pipeline."""
+
+from pathlib import Path
+
+import pytest
+from benedict import benedict
+
+from spacemk import load_normalized_data
+from spacemk.exporters import BaseExporter
+from spacemk.exporters.base import consumes
+
+
+class FlakyExporter(BaseExporter):
+    """Exporter that records its calls, and fails to map data until told otherwise"""
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.calls = []
+        self.extracted_entity_types = None
+        self.fail = True
+
+    def _extract_data(self) -> dict:
+        self.calls.append("extract")
+        self.extracted_entity_types = self._entity_types
+
+        return benedict({"workspaces": [{"id": "ws-1"}], "teams": [{"id": "team-1"}]})
+
+    @consumes("workspaces", stage="enrich")
+    def _enrich_data(self, data: dict) -> dict:
+        self.calls.append("enrich")
+        data["workspaces"][0]["enriched"] = True
+
+        return data
+
+    @consumes("workspaces", stage="map")
+    def _map_data(self, data: dict) -> dict:
+        self.calls.append("map")
+        if self.fail:
+            raise RuntimeError("Mapping failed")
+
+        return benedict({"stacks": [{"_source_id": workspace.get("id")} for workspace in data.get("workspaces")]})
+
+
+@pytest.fixture()
+def tmp_folder(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Fixture redirecting the temporary folder used for checkpoints and exported data."""
+    monkeypatch.setattr("spacemk.get_tmp_folder", lambda: tmp_path)
+    monkeypatch.setattr("spacemk.exporters.base.get_tmp_folder", lambda: tmp_path)
+
+    return tmp_path
+
+
+@pytest.mark.usefixtures("tmp_folder")
+def test_export_resumes_from_checkpoints() -> None:
+    """It replays the extracted and enriched data saved by an export that did not complete."""
+    exporter = FlakyExporter(config=benedict({}))
+    with pytest.raises(RuntimeError, match="Mapping failed"):
+        exporter.export()
+
+    assert exporter.calls == ["extract", "enrich", "map"]
+    assert exporter.extracted_entity_types == {"workspaces"}
+
+    exporter.calls.clear()
+    exporter.fail = False
+    exporter.export(resume=True)
+
+    assert exporter.calls == ["map"]
+    assert load_normalized_data("source_data.json").get("workspaces") == [{"id": "ws-1", "enriched": True}]
+    assert load_normalized_data().get("stacks") == [{"_source_id": "ws-1"}]
+
+    # Checkpoints are cleared once the export completed
+    exporter.calls.clear()
+    exporter.export(resume=True)
+    assert exporter.calls == ["extract", "enrich", "map"]
+
+
+class ChangingExporter(FlakyExporter):
+    """Exporter that changes the source provider while enriching data, and reverts it once done"""
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.fail_restore = False
+        self.restored = []
+
+    @consumes("workspaces", stage="enrich")
+    def _enrich_data(self, data: dict) -> dict:
+        self._save_checkpoint("enrich/backups/ws-1", {"execution-mode": "remote"})
+
+        return super()._enrich_data(data)
+
+    def _restore_pending_changes(self) -> None:
+        for id_, backup in self._load_checkpoints("enrich/backups/").items():
+            if self.fail_restore:
+                raise RuntimeError("Restore failed")
+
+            self.restored.append((id_, backup))
+            self._delete_checkpoint(f"enrich/backups/{id_}")
+
+
+@pytest.mark.usefixtures("tmp_folder")
+def test_export_restores_pending_changes_before_starting_over() -> None:
+    """It reverts the changes left over by an export that did not complete, before clearing its checkpoints."""
+    exporter = ChangingExporter(config=benedict({}))
+    with pytest.raises(RuntimeError, match="Mapping failed"):
+        exporter.export()
+
+    # The checkpoints are kept if the changes could not be reverted
+    exporter.fail_restore = True
+    with pytest.raises(RuntimeError, match="Restore failed"):
+        exporter.export()
+
+    exporter.calls.clear()
+    exporter.fail_restore = False
+    with pytest.raises(RuntimeError, match="Mapping failed"):
+        exporter.export()
+
+    assert exporter.restored == [("ws-1", {"execution-mode": "remote"})]
+    assert exporter.calls == ["extract", "enrich", "map"]
+
+
+class UndeclaredExporter(FlakyExporter):
+    """Exporter overriding a pipeline stage method without declaring the entity types it consumes"""
+
+    def _map_data(self, data: dict) -> dict:
+        return super()._map_data(data)
+
+
+def test_get_consumed_entity_types() -> None:
+    """It collects the entity types consumed by the given stages, unless an override does not declare them."""
+    exporter = FlakyExporter(config=benedict({}))
+
+    assert exporter._get_consumed_entity_types(stages=["enrich", "map"]) == {"workspaces"}  # noqa: SLF001
+    assert exporter._get_consumed_entity_types(stages=["check"]) == set()  # noqa: SLF001
+    assert UndeclaredExporter(config=benedict({}))._get_consumed_entity_types(stages=["map"]) is None  # noqa: SLF001
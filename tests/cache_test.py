@@ -0,0 +1,154 @@
+"""Tests for the response cache and the request memo."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+import requests
+from benedict import benedict
+
+from spacemk.cache import RequestMemo, ResponseCache
+from spacemk.exporters.terraform import TerraformExporter
+
+
+def test_response_cache_entries_expire(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """It returns entries until their time to live elapsed, and deletes them afterwards."""
+    now = time.time()
+    monkeypatch.setattr("spacemk.cache.time.time", lambda: now)
+    cache = ResponseCache(path=tmp_path, ttl=60, max_size=1024)
+    cache.set("/workspaces/ws-1", "body", etag='"abc"', last_modified="Wed, 21 Oct 2026 07:28:00 GMT")
+
+    now += 60
+    assert cache.get("/workspaces/ws-1") == {
+        "body": "body",
+        "etag": '"abc"',
+        "last_modified": "Wed, 21 Oct 2026 07:28:00 GMT",
+        "stored_at": now - 60,
+    }
+
+    now += 1
+    assert cache.get("/workspaces/ws-1") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_response_cache_evicts_the_oldest_entries(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """It deletes the least recently stored entries once the cache grows over its maximum size."""
+    cache = ResponseCache(path=tmp_path, ttl=60, max_size=1024 * 1024)
+    cache.set("/workspaces/ws-0", "x" * 100)
+    entry_size = next(tmp_path.iterdir()).stat().st_size
+    monkeypatch.setattr(cache, "_max_size", entry_size * 2.5)
+
+    for i in range(1, 3):
+        time.sleep(0.01)
+        cache.set(f"/workspaces/ws-{i}", "x" * 100)
+
+    assert cache.get("/workspaces/ws-0") is None
+    assert cache.get("/workspaces/ws-1") is not None
+    assert cache.get("/workspaces/ws-2") is not None
+    assert len(list(tmp_path.iterdir())) == 2  # noqa: PLR2004
+
+
+def test_response_cache_replaces_entries_atomically(tmp_path: Path) -> None:
+    """It replaces entries without leaving temporary files behind, nor counting the previous entry's size."""
+    cache = ResponseCache(path=tmp_path, ttl=60, max_size=1024 * 1024)
+    cache.set("/workspaces/ws-1", "before")
+    cache.set("/workspaces/ws-1", "after", etag='"abc"')
+
+    assert cache.get("/workspaces/ws-1").get("body") == "after"
+    assert [path.suffix for path in tmp_path.iterdir()] == [".json"]
+    assert cache._size == next(tmp_path.iterdir()).stat().st_size  # noqa: SLF001
+
+    # Partially written entries are ignored
+    next(tmp_path.iterdir()).write_text('{"body": "aft', encoding="utf-8")
+    assert cache.get("/workspaces/ws-1") is None
+
+
+@pytest.mark.parametrize(
+    ("response_headers", "request_header"),
+    [
+        ({"ETag": '"abc"'}, ("If-None-Match", '"abc"')),
+        ({"Last-Modified": "Wed, 21 Oct 2026 07:28:00 GMT"}, ("If-Modified-Since", "Wed, 21 Oct 2026 07:28:00 GMT")),
+    ],
+)
+def test_response_cache_revalidation(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, response_headers: dict, request_header: tuple[str, str]
+) -> None:
+    """It revalidates cached responses with conditional requests, and uses them if they were not modified."""
+    monkeypatch.setattr("spacemk.get_tmp_folder", lambda: tmp_path)
+    exporter = TerraformExporter(
+        config=benedict(
+            {"api_endpoint": "https://tfe.example.com", "api_token": "token", "response_cache": {"enabled": True}}
+        )
+    )
+    exporter._extracting = True  # noqa: SLF001
+
+    sent_headers = []
+
+    def send_request(method: str, url: str, **kwargs) -> requests.Response:  # noqa: ARG001
+        sent_headers.append(kwargs.get("headers"))
+
+        response = requests.Response()
+        response.headers.update(response_headers)
+        if kwargs.get("headers"):
+            response.status_code = 304
+            response._content = b""  # noqa: SLF001
+        else:
+            response.status_code = 200
+            response._content = b'{"data": {"id": "ws-1"}}'  # noqa: SLF001
+
+        return response
+
+    monkeypatch.setattr(exporter, "_send_request", send_request)
+    monkeypatch.setattr("spacemk.exporters.terraform.request_dump.dump_all", lambda _: b"")
+
+    url = "https://tfe.example.com/api/v2/workspaces/ws-1"
+    for _ in range(2):
+        assert exporter._get_cached_response_body(url) == '{"data": {"id": "ws-1"}}'  # noqa: SLF001
+
+    assert sent_headers == [{}, dict([request_header])]
+
+
+def test_request_memo_coalesces_concurrent_calls() -> None:
+    """It only makes one call for concurrent calls with the same key, and memoizes the response."""
+    calls = []
+    lock = threading.Lock()
+
+    def func() -> str:
+        with lock:
+            calls.append(1)
+        time.sleep(0.1)
+        return "body"
+
+    memo = RequestMemo(max_size=1024)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        responses = list(executor.map(lambda _: memo.call("/workspaces/ws-1", func), range(4)))
+
+    assert responses == ["body"] * 4
+    assert memo.call("/workspaces/ws-1", func) == "body"
+    assert len(calls) == 1
+
+
+def test_request_memo_invalidation() -> None:
+    """It makes the call again once the memoized response is invalidated."""
+    responses = iter(["before", "after"])
+    memo = RequestMemo(max_size=1024)
+
+    assert memo.call("/workspaces/ws-1", lambda: next(responses)) == "before"
+    memo.invalidate(lambda key: key.startswith("/workspaces/ws-1"))
+    assert memo.call("/workspaces/ws-1", lambda: next(responses)) == "after"
+
+
+def test_request_memo_disabled() -> None:
+    """It does not memoize any response when its maximum size is 0."""
+    calls = []
+
+    def func() -> str:
+        calls.append(1)
+        return ""
+
+    memo = RequestMemo(max_size=0)
+    assert memo.call("/workspaces/ws-1", func) == ""
+    assert memo.call("/workspaces/ws-1", func) == ""
+    assert len(calls) == 2  # noqa: PLR2004
@@ -0,0 +1,29 @@
+"""Tests for the entity index."""
+
+from spacemk.entity_index import EntityIndex
+
+
+def test_entity_index_lookups() -> None:
+    """It finds entities by ID, keeping the first entity for duplicate IDs."""
+    first = {"id": "ws-1", "name": "first"}
+    data = {"workspaces": [first, {"id": "ws-1", "name": "duplicate"}], "spaces": [{"_source_id": "prj-1"}]}
+    index = EntityIndex(data)
+
+    assert index.get("workspaces", "ws-1") is first
+    assert index.get("workspaces", "ws-2") is None
+    assert index.get("spaces", "prj-1", id_keypath="_source_id") == {"_source_id": "prj-1"}
+    assert index.get("missing", "ws-1") is None
+
+
+def test_entity_index_follows_changes() -> None:
+    """It rebuilds the index when the entity list changes or is invalidated."""
+    data = {"workspaces": [{"id": "ws-1"}]}
+    index = EntityIndex(data)
+    assert index.get("workspaces", "ws-2") is None
+
+    data["workspaces"].append({"id": "ws-2"})
+    assert index.get("workspaces", "ws-2") == {"id": "ws-2"}
+
+    data["workspaces"][0]["id"] = "ws-3"
+    index.invalidate("workspaces")
+    assert index.get("workspaces", "ws-3") == {"id": "ws-3"}
@@ -0,0 +1,53 @@
+"""Tests for hedged requests."""
+
+import itertools
+import threading
+import time
+
+from spacemk.hedging import Hedger
+
+
+def test_hedger_uses_the_first_response() -> None:
+    """It sends a duplicate of slow calls and returns whichever result arrives first."""
+    hedger = Hedger(max_workers=4, min_samples=5)
+    for _ in range(5):
+        hedger.call(lambda: time.sleep(0.01))
+
+    counter = itertools.count()
+    discarded = threading.Event()
+
+    def func() -> str:
+        if next(counter) == 0:
+            time.sleep(0.5)
+            return "slow"
+        return "fast"
+
+    start = time.monotonic()
+    assert hedger.call(func, discard=lambda _: discarded.set()) == "fast"
+    assert time.monotonic() - start < 0.5  # noqa: PLR2004
+    assert discarded.wait(timeout=1)
+
+
+def test_hedger_does_not_hedge_without_enough_samples() -> None:
+    """It only sends one call until enough latencies have been observed."""
+    hedger = Hedger(max_workers=4, min_samples=5)
+    calls = itertools.count()
+
+    assert hedger.call(lambda: next(calls)) == 0
+    assert next(calls) == 1
+
+
+def test_hedger_does_not_hedge_when_not_admitted() -> None:
+    """It waits for the original call when a duplicate is not admitted."""
+    hedger = Hedger(max_workers=4, min_samples=5)
+    for _ in range(5):
+        hedger.call(lambda: None)
+
+    calls = itertools.count()
+
+    def func() -> int:
+        time.sleep(0.05)
+        return next(calls)
+
+    assert hedger.call(func, admit=lambda: None) == 0
+    assert next(calls) == 1
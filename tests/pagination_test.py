@@ -0,0 +1,30 @@
+"""Tests for the pagination strategies."""
+
+from spacemk.pagination import CursorPaginator, LinkPaginator, OffsetPaginator
+
+
+def test_link_and_cursor_paginators() -> None:
+    """It follows next links from the payload or the Link header, and cursors from the payload."""
+    url = "https://example.com/items?per_page=10"
+
+    assert LinkPaginator("links.next").get_next_url(url, {"links.next": "https://example.com/2"}, {}) == (
+        "https://example.com/2"
+    )
+    assert LinkPaginator().get_next_url(url, {}, {"Link": '<https://example.com/2>; rel="next"'}) == (
+        "https://example.com/2"
+    )
+    assert LinkPaginator().get_next_url(url, {}, {}) is None
+    assert CursorPaginator("next_cursor").get_next_url(url, {"next_cursor": "abc"}, {}) == (
+        "https://example.com/items?per_page=10&cursor=abc"
+    )
+    assert CursorPaginator("next_cursor").get_next_url(url, {"next_cursor": None}, {}) is None
+
+
+def test_offset_paginator() -> None:
+    """It requests the next offset until a page is not full."""
+    paginator = OffsetPaginator("items", page_size=2)
+    url = paginator.get_first_url("https://example.com/items")
+
+    assert url == "https://example.com/items?limit=2&offset=0"
+    assert paginator.get_next_url(url, {"items": [1, 2]}, {}) == "https://example.com/items?limit=2&offset=2"
+    assert paginator.get_next_url(url, {"items": [1]}, {}) is None
@@ -0,0 +1,45 @@
+"""Tests for the rate limiter."""
+
+import time
+
+from spacemk.ratelimit import RateLimiter, get_rate_limiter, parse_retry_after
+
+
+def test_parse_retry_after_handles_seconds_and_invalid_values() -> None:
+    """It parses delays expressed in seconds and ignores invalid values."""
+    delay = 2.5
+
+    assert parse_retry_after(str(delay)) == delay
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+
+def test_rate_limiter_pauses_when_the_rate_limit_is_exhausted() -> None:
+    """It waits for the rate limit to be reset before letting the next request through."""
+    reset = 0.2
+    rate_limiter = RateLimiter(rate=100, max_concurrency=1)
+    rate_limiter.update({"X-RateLimit-Limit": "100", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(reset)})
+
+    start = time.monotonic()
+    with rate_limiter.limit():
+        pass
+
+    assert time.monotonic() - start >= reset / 2
+
+
+def test_get_rate_limiter_is_shared() -> None:
+    """It returns the same rate limiter for the same API."""
+    assert get_rate_limiter("https://example.com", 30, 10) is get_rate_limiter("https://example.com", 1, 1)
+
+
+def test_rate_limiter_try_limit_does_not_wait() -> None:
+    """It only reserves a slot for an optional request when one can be sent right away."""
+    rate_limiter = RateLimiter(rate=1, max_concurrency=2)
+
+    admission = rate_limiter.try_limit()
+    assert admission is not None
+    with admission:
+        pass
+
+    # The only token has been used
+    assert rate_limiter.try_limit() is None
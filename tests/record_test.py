@@ -0,0 +1,28 @@
+"""Tests for the record type."""
+
+import json
+
+from spacemk.record import Record, json_default
+
+
+def test_record_supports_keypaths() -> None:
+    """It looks up, sets and groups values by keypath like a benedict."""
+    record = Record(["attributes.name", "attributes.vcs-repo.branch", "id"], ["app", None, "ws-1"])
+    record["attributes.vcs-repo.branch"] = "main"
+    record["warnings"] = "No agents"
+
+    assert record.get("attributes.name") == "app"
+    assert record.get("attributes.vcs-repo") == {"branch": "main"}
+    assert record.get("attributes.missing", "default") == "default"
+    assert "attributes.name" in record
+    assert "attributes.missing" not in record
+    assert record["warnings"] == "No agents"
+
+
+def test_record_serializes_to_nested_dicts() -> None:
+    """It is serialized to JSON as nested dicts."""
+    record = Record(["attributes.name", "relationships.organization.data.id"], ["app", "org-1"])
+
+    assert json.loads(json.dumps([record], default=json_default)) == [
+        {"attributes": {"name": "app"}, "relationships": {"organization": {"data": {"id": "org-1"}}}}
+    ]
@@ -0,0 +1,599 @@
+"""Tests for the Terraform exporter."""
+
+import time
+from collections.abc import Callable
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import requests
+from benedict import benedict
+
+from spacemk.checkpoint import Checkpoint
+from spacemk.exporters.terraform import (
+    TerraformExporter,
+    TerraformExporterHTTPError,
+    group_workspace_variables_with_invalid_name,
+    parse_plan_env_vars,
+)
+
+START_MARKER = "<==================== SMK EXPORT ====================\n"
+END_MARKER = "===================== SMK EXPORT ===================>\n"
+
+
+@pytest.fixture()
+def exporter() -> TerraformExporter:
+    """Fixture for a Terraform exporter that does not need a Terraform API."""
+    return TerraformExporter(config=benedict({"api_endpoint": "https://tfe.example.com", "api_token": "token"}))
+
+
+def test_parse_plan_env_vars_separated_by_nul_characters() -> None:
+    """It only parses the output between the markers, and supports multi-line values."""
+    logs_data = f"NOISE=1\n{START_MARKER}FOO=bar\0KEY=-----BEGIN-----\nabc=\n-----END-----\n\0EMPTY=\0{END_MARKER}"
+
+    assert parse_plan_env_vars(logs_data) == {
+        "EMPTY": "",
+        "FOO": "bar",
+        "KEY": "-----BEGIN-----\nabc=\n-----END-----\n",
+    }
+
+
+def test_parse_plan_env_vars_one_per_line() -> None:
+    """It falls back to one variable per line, appending the other lines to the previous value."""
+    logs_data = f"{START_MARKER}FOO=bar=baz\nMULTI=first\nsecond line\ninvalid-name=1\n{END_MARKER}"
+
+    assert parse_plan_env_vars(logs_data) == {
+        "FOO": "bar=baz",
+        "MULTI": "first\nsecond line",
+        "invalid-name": "1",
+    }
+
+
+@pytest.mark.parametrize(
+    ("pattern", "search_term"),
+    [
+        (None, None),
+        ("^prod-.*$", "prod-"),
+        (".*prod.*", "prod"),
+        ("^my-org$", "my-org"),
+        (r"^app\.example$", "app.example"),
+        (".*", None),
+        ("^a|b$", None),
+        (r"\d", None),
+        (r"^\d+-app$", None),
+        ("(?i)prod", None),
+        ("prod.*staging", None),
+    ],
+)
+def test_get_name_search_term(exporter: TerraformExporter, pattern: str | None, search_term: str | None) -> None:
+    """It only finds a search term for patterns that match names containing a literal."""
+    assert exporter._get_name_search_term(pattern) == search_term  # noqa: SLF001
+
+
+def test_iter_data_from_api_falls_back_without_sparse_fieldsets(
+    exporter: TerraformExporter, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """It requests collections without sparse fieldsets once the Terraform API rejected them."""
+    urls = []
+
+    def call_api(url: str, drop_response_properties: list | None = None, memoize: bool = True) -> dict:  # noqa: ARG001
+        urls.append(url)
+        query = parse_qs(urlsplit(url).query)
+
+        if "fields[workspaces]" in query:
+            response = requests.Response()
+            response.status_code = 400
+            raise TerraformExporterHTTPError(requests.exceptions.HTTPError(response=response))
+
+        if query.get("page[number]") == ["2"]:
+            return benedict({"data": [{"id": "ws-2", "attributes": {"name": "second", "other": 2}}]})
+
+        return benedict(
+            {
+                "data": [{"id": "ws-1", "attributes": {"name": "first", "other": 1}}],
+                "links": {"next": f"{url}?page%5Bnumber%5D=2"},
+            }
+        )
+
+    monkeypatch.setattr(exporter, "_call_api", call_api)
+
+    def extract() -> list[dict]:
+        return list(
+            exporter._iter_data_from_api(  # noqa: SLF001
+                "/organizations/my-org/workspaces",
+                properties=["id", "attributes.name"],
+                resource_type="workspaces",
+            )
+        )
+
+    assert [(datum.get("id"), datum.get("attributes.name")) for datum in extract()] == [
+        ("ws-1", "first"),
+        ("ws-2", "second"),
+    ]
+    assert len(urls) == 3  # noqa: PLR2004
+    assert not exporter.sparse_fieldsets
+
+    # Sparse fieldsets are not requested again
+    urls.clear()
+    assert len(extract()) == 2  # noqa: PLR2004
+    assert all("fields" not in parse_qs(urlsplit(url).query) for url in urls)
+
+
+def test_expand_relationships_after_data_replacement(exporter: TerraformExporter) -> None:
+    """It expands relationships to the current entities, even once they have been looked up and replaced."""
+    data = benedict(
+        {
+            "spaces": [{"_source_id": "prj-1", "name": "Old"}],
+            "stacks": [
+                {"_source_id": "ws-1", "name": "first", "_relationships": {"space": "prj-1"}},
+                {"_source_id": "ws-2", "name": "second", "_relationships": {"space": "prj-2"}},
+            ],
+        }
+    )
+    assert exporter._get_entity(data, "spaces", "prj-1", id_keypath="_source_id").get("name") == "Old"  # noqa: SLF001
+
+    data["spaces"] = [{"_source_id": "prj-1", "name": "New"}]
+    data = exporter._expand_relationships(data)  # noqa: SLF001
+
+    first, second = data.get("stacks")
+    assert first.get("_relationships.space.name") == "New"
+    assert first.get("_relationships.space._migration_id") == "new"
+    assert second.get("_relationships.space") is None
+
+    # The related entity is a copy without its own relationships
+    assert "_relationships" not in first.get("_relationships.space")
+    assert data.get("spaces")[0].get("_relationships") == {}
+
+
+def test_group_workspace_variables_with_invalid_name() -> None:
+    """It groups the variables with an invalid name by workspace and type, ignoring unknown workspaces."""
+
+    def variable(id_: str, workspace_id: str, key: str, sensitive: bool | None) -> dict:
+        return benedict(
+            {
+                "id": id_,
+                "attributes": {"key": key, "sensitive": sensitive},
+                "relationships": {"workspace": {"data": {"id": workspace_id}}},
+            }
+        )
+
+    data = benedict(
+        {
+            "workspaces": [{"id": "ws-1"}, {"id": "ws-2"}],
+            "workspace_variables": [
+                variable("var-1", "ws-1", "VALID_NAME", False),
+                variable("var-2", "ws-1", "invalid-name", False),
+                variable("var-3", "ws-1", "1NVALID", True),
+                variable("var-4", "ws-2", "invalid.name", None),
+                variable("var-5", "ws-3", "invalid-name", False),
+            ],
+        }
+    )
+
+    groups = group_workspace_variables_with_invalid_name(data)
+
+    assert {key: [variable.get("id") for variable in value] for key, value in groups.items()} == {
+        ("ws-1", "plain"): ["var-2"],
+        ("ws-1", "secret"): ["var-3"],
+        ("ws-2", "plain"): ["var-4"],
+        ("ws-2", "secret"): ["var-4"],
+    }
+
+
+@pytest.mark.parametrize("checkpoint_pages", [False, True])
+def test_call_api_for_page_only_checkpoints_pages_when_enabled(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, checkpoint_pages: bool
+) -> None:
+    """It only saves the pages pulled while extracting data if the checkpoint_pages setting is enabled."""
+    monkeypatch.setattr("spacemk.get_tmp_folder", lambda: tmp_path)
+    exporter = TerraformExporter(
+        config=benedict(
+            {"api_endpoint": "https://tfe.example.com", "api_token": "token", "checkpoint_pages": checkpoint_pages}
+        )
+    )
+    exporter._checkpoint = Checkpoint(name="export")  # noqa: SLF001
+    exporter._extracting = True  # noqa: SLF001
+
+    urls = []
+
+    def call_api(url: str, drop_response_properties: list | None = None, memoize: bool = True) -> dict:  # noqa: ARG001
+        urls.append(url)
+        return benedict({"data": [{"id": "ws-1"}]})
+
+    monkeypatch.setattr(exporter, "_call_api", call_api)
+
+    for _ in range(2):
+        assert exporter._call_api_for_page("https://tfe.example.com/api/v2/workspaces").get("data") == [  # noqa: SLF001
+            {"id": "ws-1"}
+        ]
+
+    assert len(urls) == (1 if checkpoint_pages else 2)
+    assert bool(exporter._load_checkpoints("extract/pages/")) == checkpoint_pages  # noqa: SLF001
+
+
+def test_restore_pending_changes(exporter: TerraformExporter, monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """It reverts the workspaces and variable sets left over by a previous export, and deletes their backups."""
+    monkeypatch.setattr("spacemk.get_tmp_folder", lambda: tmp_path)
+    exporter._checkpoint = Checkpoint(name="export")  # noqa: SLF001
+    exporter._save_checkpoint(  # noqa: SLF001
+        "enrich/backups/ws-1",
+        {
+            "attributes": {"execution-mode": "remote", "setting-overwrites": {"execution-mode": False}},
+            "relationships": {"agent-pool": {"data": None}, "organization": {"data": {"id": "my-org"}}},
+        },
+    )
+    exporter._save_checkpoint(  # noqa: SLF001
+        "enrich/variable_set_backups/varset-1",
+        {
+            "attributes": {"global": False, "priority": False},
+            "relationships": {"workspaces": {"data": [{"id": "ws-1", "type": "workspaces"}]}},
+        },
+    )
+    exporter._save_checkpoint("enrich/workspaces/ws-2", {"branch": None, "variables": {}})  # noqa: SLF001
+
+    requests_ = []
+
+    def extract_data_from_api(path: str, method: str = "GET", request_data: dict | None = None, **_) -> list[dict]:
+        requests_.append((method, path, request_data["data"]["attributes"]))
+        return []
+
+    monkeypatch.setattr(exporter, "_extract_data_from_api", extract_data_from_api)
+
+    exporter._restore_pending_changes()  # noqa: SLF001
+
+    assert requests_ == [
+        ("PATCH", "/workspaces/ws-1", {"execution-mode": "remote", "setting-overwrites": {"execution-mode": False}}),
+        ("PATCH", "/varsets/varset-1", {"priority": False, "global": False}),
+    ]
+    assert exporter._load_checkpoints("enrich/") == {"workspaces_ws-2": {"branch": None, "variables": {}}}  # noqa: SLF001
+
+
+def test_collection_pages_are_not_memoized(exporter: TerraformExporter, monkeypatch: pytest.MonkeyPatch) -> None:
+    """It only memoizes single resources, so that the pages of a collection are not held in memory."""
+    urls = []
+
+    def get_cached_response_body(url: str) -> str:
+        urls.append(url)
+        if "page%5Bnumber%5D=2" in url:
+            return '{"data": [{"id": "ws-2", "type": "workspaces"}]}'
+
+        if "/workspaces/" in url:
+            return '{"data": {"id": "ws-1", "type": "workspaces"}}'
+
+        return f'{{"data": [{{"id": "ws-1", "type": "workspaces"}}], "links": {{"next": "{url}?page%5Bnumber%5D=2"}}}}'
+
+    monkeypatch.setattr(exporter, "_get_cached_response_body", get_cached_response_body)
+
+    for _ in range(2):
+        assert len(exporter._extract_data_from_api("/organizations/my-org/workspaces")) == 2  # noqa: SLF001, PLR2004
+        assert len(exporter._extract_data_from_api("/workspaces/ws-1")) == 1  # noqa: SLF001
+
+    assert sum("/organizations/my-org/workspaces" in url for url in urls) == 4  # noqa: PLR2004
+    assert sum("/workspaces/ws-1" in url for url in urls) == 1
+
+
+@pytest.mark.parametrize(
+    ("response_payload", "page_numbers"),
+    [
+        (
+            {
+                "links": {"next": "https://tfe.example.com/api/v2/workspaces?page%5Bnumber%5D=2&page%5Bsize%5D=1"},
+                "meta": {"pagination": {"current-page": 1, "total-pages": 4}},
+            },
+            ["2", "3", "4"],
+        ),
+        (
+            {
+                "links": {"next": "https://tfe.example.com/api/v2/workspaces?page%5Bnumber%5D=3&page%5Bsize%5D=1"},
+                "meta": {"pagination": {"current-page": 2, "total-pages": 3}},
+            },
+            ["3"],
+        ),
+        ({"links": {"next": "https://tfe.example.com/api/v2/workspaces?page%5Bnumber%5D=2"}}, []),
+        (
+            {
+                "links": {"next": "https://tfe.example.com/api/v2/workspaces?cursor=abc"},
+                "meta": {"pagination": {"total-pages": 2}},
+            },
+            [],
+        ),
+        ({"links": {"next": None}, "meta": {"pagination": {"current-page": 1, "total-pages": 1}}}, []),
+    ],
+)
+def test_get_remaining_page_urls(exporter: TerraformExporter, response_payload: dict, page_numbers: list[str]) -> None:
+    """It only builds the URLs of the remaining pages from the total-pages metadata and a page number next link."""
+    urls = exporter._get_remaining_page_urls(benedict(response_payload))  # noqa: SLF001
+
+    assert [parse_qs(urlsplit(url).query)["page[number]"][0] for url in urls] == page_numbers
+    assert all(parse_qs(urlsplit(url).query)["page[size]"] == ["1"] for url in urls)
+
+
+def paginated_call_api_for_page(total_pages: int | None, fail_page: int | None = None) -> tuple[list, Callable]:
+    urls = []
+
+    def call_api_for_page(url: str, drop_response_properties: list | None = None, memoize: bool = False) -> dict:  # noqa: ARG001
+        urls.append(url)
+        page_number = int(parse_qs(urlsplit(url).query).get("page[number]", ["1"])[0])
+        if page_number == fail_page:
+            raise RuntimeError(f"Page {page_number} failed")
+
+        # The first pages arrive last
+        time.sleep(0.01 * (5 - page_number))
+
+        response_payload = {"data": [{"id": f"ws-{page_number}"}], "links": {"next": None}}
+        if page_number < 4:  # noqa: PLR2004
+            next_query = f"page%5Bnumber%5D={page_number + 1}"
+            response_payload["links"]["next"] = f"https://tfe.example.com/api/v2/workspaces?{next_query}"
+        if total_pages:
+            response_payload["meta"] = {"pagination": {"current-page": page_number, "total-pages": total_pages}}
+
+        return benedict(response_payload)
+
+    return urls, call_api_for_page
+
+
+@pytest.mark.parametrize("total_pages", [4, None])
+def test_iter_pages_keeps_page_order(
+    exporter: TerraformExporter, monkeypatch: pytest.MonkeyPatch, total_pages: int | None
+) -> None:
+    """It yields pages in order, whether they are prefetched concurrently or follow the next links one by one."""
+    exporter.pagination_workers = 3
+    urls, call_api_for_page = paginated_call_api_for_page(total_pages)
+    monkeypatch.setattr(exporter, "_call_api_for_page", call_api_for_page)
+
+    response_payloads = exporter._iter_pages("https://tfe.example.com/api/v2/workspaces")  # noqa: SLF001
+
+    assert [response_payload.get("data")[0]["id"] for response_payload in response_payloads] == [
+        "ws-1",
+        "ws-2",
+        "ws-3",
+        "ws-4",
+    ]
+    assert len(urls) == 4  # noqa: PLR2004
+
+
+def test_iter_pages_propagates_prefetched_page_errors(
+    exporter: TerraformExporter, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """It raises the error of a prefetched page once that page is reached."""
+    exporter.pagination_workers = 3
+    _, call_api_for_page = paginated_call_api_for_page(total_pages=4, fail_page=3)
+    monkeypatch.setattr(exporter, "_call_api_for_page", call_api_for_page)
+
+    response_payloads = exporter._iter_pages("https://tfe.example.com/api/v2/workspaces")  # noqa: SLF001
+
+    assert next(response_payloads).get("data")[0]["id"] == "ws-1"
+    assert next(response_payloads).get("data")[0]["id"] == "ws-2"
+    with pytest.raises(RuntimeError, match="Page 3 failed"):
+        next(response_payloads)
+
+
+def build_response(status_code: int, headers: dict | None = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+
+    return response
+
+
+@pytest.mark.parametrize(
+    ("headers", "delay"),
+    [
+        ({"Retry-After": "7"}, 7),
+        ({"Retry-After": "2.5", "X-RateLimit-Reset": "9"}, 2.5),
+        ({"X-RateLimit-Reset": "0.5"}, 0.5),
+    ],
+)
+@pytest.mark.parametrize("status_code", [429, 503])
+def test_get_retry_delay_honors_retry_after(
+    exporter: TerraformExporter, headers: dict, delay: float, status_code: int
+) -> None:
+    """It waits for the delay given by the API, falling back to the rate limit reset delay."""
+    response = build_response(status_code, headers)
+
+    assert exporter._get_retry_delay("GET", 0, response) == delay  # noqa: SLF001
+
+
+@pytest.mark.parametrize("method", ["GET", "POST", "PATCH", "DELETE"])
+def test_get_retry_delay_retries_rate_limited_requests(exporter: TerraformExporter, method: str) -> None:
+    """It retries rate limited requests regardless of the method, as they have not been processed."""
+    delay = exporter._get_retry_delay(method, 2, build_response(429))  # noqa: SLF001
+
+    assert 2 <= delay <= 4  # noqa: PLR2004
+
+
+@pytest.mark.parametrize("status_code", [None, 500, 502, 503, 504])
+@pytest.mark.parametrize(("method", "retried"), [("GET", True), ("head", True), ("POST", False), ("PATCH", False)])
+def test_get_retry_delay_only_retries_idempotent_requests_on_errors(
+    exporter: TerraformExporter, status_code: int | None, method: str, retried: bool
+) -> None:
+    """It only retries idempotent requests on connection and server errors, as the others may have been processed."""
+    response = None if status_code is None else build_response(status_code, {"Retry-After": "1"})
+
+    assert (exporter._get_retry_delay(method, 0, response) is not None) == retried  # noqa: SLF001
+
+
+@pytest.mark.parametrize("status_code", [400, 404, 409])
+def test_get_retry_delay_does_not_retry_client_errors(exporter: TerraformExporter, status_code: int) -> None:
+    """It does not retry client errors, other than rate limiting."""
+    assert exporter._get_retry_delay("GET", 0, build_response(status_code)) is None  # noqa: SLF001
+
+
+def test_get_retry_delay_gives_up_after_max_retries(exporter: TerraformExporter) -> None:
+    """It stops retrying once the maximum number of retries has been reached."""
+    exporter.api_max_retries = 2
+
+    assert exporter._get_retry_delay("GET", 1, build_response(429)) is not None  # noqa: SLF001
+    assert exporter._get_retry_delay("GET", 2, build_response(429)) is None  # noqa: SLF001
+
+
+def test_incremental_export_reuses_unchanged_workspaces(
+    exporter: TerraformExporter, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    """It reuses the variables and branch of the workspaces whose timestamps did not change since the last export."""
+
+    def workspace(id_: str, updated_at: str | None, branch: str | None = None) -> dict:
+        return {
+            "id": id_,
+            "attributes": {"latest-change-at": "2026-01-01", "updated-at": updated_at, "vcs-repo": {"branch": branch}},
+        }
+
+    def variable(id_: str, workspace_id: str) -> dict:
+        return {"id": id_, "relationships": {"workspace": {"data": {"id": workspace_id}}}}
+
+    exporter._previous_data = benedict(  # noqa: SLF001
+        {
+            "workspaces": [
+                workspace("ws-unchanged", "2026-01-01", branch="main"),
+                workspace("ws-changed", "2026-01-01"),
+                workspace("ws-no-timestamp", None),
+            ],
+            "workspace_variables": [
+                variable("var-unchanged", "ws-unchanged"),
+                variable("var-changed-old", "ws-changed"),
+                variable("var-no-timestamp-old", "ws-no-timestamp"),
+            ],
+        }
+    )
+    data = benedict(
+        {
+            "workspaces": [
+                workspace("ws-unchanged", "2026-01-01"),
+                workspace("ws-changed", "2026-02-01"),
+                workspace("ws-no-timestamp", None),
+                workspace("ws-new", "2026-02-01"),
+            ]
+        }
+    )
+
+    extracted_workspace_ids = []
+
+    def extract_workspace_variables_data(workspace: dict) -> list[dict]:
+        extracted_workspace_ids.append(workspace.get("id"))
+        return [benedict(variable(f"var-{workspace.get('id').removeprefix('ws-')}-new", workspace.get("id")))]
+
+    monkeypatch.setattr(exporter, "_extract_checkpointed_workspace_variables_data", extract_workspace_variables_data)
+    caplog.set_level("INFO")
+
+    variables = exporter._extract_all_workspace_variables_data(data)  # noqa: SLF001
+
+    assert [variable.get("id") for variable in variables] == [
+        "var-unchanged",
+        "var-changed-new",
+        "var-no-timestamp-new",
+        "var-new-new",
+    ]
+    assert sorted(extracted_workspace_ids) == ["ws-changed", "ws-new", "ws-no-timestamp"]
+    assert data.get("workspaces")[0].get("attributes.vcs-repo.branch") == "main"
+    assert "Reusing the variables of 1 unchanged workspace(s): ws-unchanged" in caplog.text
+
+    # The workspaces saved by the previous export are only indexed once
+    unchanged_workspaces = exporter._get_unchanged_workspaces(data.get("workspaces"))  # noqa: SLF001
+    assert list(unchanged_workspaces) == ["ws-unchanged"]
+    assert exporter._get_unchanged_workspaces(data.get("workspaces"))["ws-unchanged"] is unchanged_workspaces[  # noqa: SLF001
+        "ws-unchanged"
+    ]
+
+
+def test_quick_audit_counts_entities_from_pagination_metadata(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    """It only pulls one entity per collection, and reports the total count from the pagination metadata."""
+    exporter = TerraformExporter(
+        config=benedict(
+            {
+                "api_endpoint": "https://tfe.example.com",
+                "api_token": "token",
+                "bulk_variable_extraction": True,
+                "experimental_support_variable_sets": True,
+            }
+        )
+    )
+    monkeypatch.setattr("spacemk.exporters.terraform.is_command_available", lambda *_, **__: True)
+
+    urls = []
+
+    def call_api(url: str, drop_response_properties: list | None = None, **_) -> dict:  # noqa: ARG001
+        urls.append(url)
+        parsed_url = urlsplit(url)
+        if parsed_url.path == "/api/v2/organizations":
+            return benedict({"data": [{"id": "my-org", "attributes": {"name": "my-org"}}]})
+
+        collection = parsed_url.path.rsplit("/", 1)[-1]
+        total_count = 10 if collection == "workspaces" else 1000 if collection == "vars" else 3
+
+        return benedict(
+            {
+                "data": [{"id": f"{collection}-1"}],
+                "meta": {"pagination": {"total-count": total_count, "total-pages": total_count}},
+            }
+        )
+
+    monkeypatch.setattr(exporter, "_call_api", call_api)
+
+    exporter.audit(quick=True)
+
+    collection_urls = [url for url in urls if urlsplit(url).path != "/api/v2/organizations"]
+    assert len(collection_urls) == 11  # noqa: PLR2004
+    assert all(parse_qs(urlsplit(url).query)["page[size]"] == ["1"] for url in collection_urls)
+
+    output = capsys.readouterr().out
+    assert "Organizations: 1\n" in output
+    assert "Workspaces: 10\n" in output
+    assert "Workspace Variables: 1000\n" in output
+    assert "Variable Sets: 3\n" in output
+
+
+@pytest.mark.parametrize(
+    ("entity_types", "entity_type", "needed"),
+    [
+        (None, "teams", True),
+        ({"workspaces"}, "workspaces", True),
+        ({"workspaces"}, "teams", False),
+        ({"workspace_variables"}, "workspaces", True),
+        ({"variable_set_variables"}, "variable_sets", True),
+        ({"variable_set_variables"}, "workspaces", False),
+    ],
+)
+def test_needs_entity_type(
+    exporter: TerraformExporter, entity_types: set | None, entity_type: str, needed: bool
+) -> None:
+    """It needs the consumed entity types, and the ones that are extracted for each of their entities."""
+    exporter._entity_types = entity_types  # noqa: SLF001
+
+    assert exporter._needs_entity_type(entity_type) == needed  # noqa: SLF001
+
+
+def test_export_only_extracts_consumed_entity_types(
+    exporter: TerraformExporter, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """It does not extract the entity types that no enrichment nor mapping stage consumes."""
+    extracted_entity_types = []
+
+    def extractor(entity_type: str) -> Callable:
+        def extract(organization: dict) -> list[dict]:  # noqa: ARG001
+            extracted_entity_types.append(entity_type)
+            return []
+
+        return extract
+
+    for entity_type in [
+        "agent_pools",
+        "modules",
+        "policies",
+        "policy_sets",
+        "projects",
+        "providers",
+        "tasks",
+        "teams",
+        "workspaces",
+    ]:
+        monkeypatch.setattr(exporter, f"_extract_{entity_type}_data", extractor(entity_type))
+    monkeypatch.setattr(exporter, "_extract_organization_data", lambda: [benedict({"id": "my-org"})])
+    monkeypatch.setattr(exporter, "_extract_all_workspace_variables_data", lambda data: [])  # noqa: ARG005
+
+    exporter._entity_types = exporter._get_consumed_entity_types(stages=["enrich", "map"])  # noqa: SLF001
+    exporter._extract_data()  # noqa: SLF001
+
+    assert "teams" not in exporter._entity_types  # noqa: SLF001
+    assert sorted(extracted_entity_types) == ["modules", "projects", "workspaces"]
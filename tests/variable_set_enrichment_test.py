@@ -0,0 +1,279 @@
+"""Tests for the parallel enrichment of variable sets with temporary workspaces."""
+
+import itertools
+import logging
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import pytest
+from benedict import benedict
+
+from spacemk.exporters.terraform import TerraformExporter
+
+START_MARKER = "<==================== SMK EXPORT ====================\n"
+END_MARKER = "===================== SMK EXPORT ===================>\n"
+
+
+class FakeContainer:
+    """Agent container that is never running"""
+
+    def __init__(self, name: str):
+        self.id = name
+
+    def exists(self) -> bool:
+        return False
+
+
+class FakeTerraformAPI:
+    """In-memory stand-in for the Terraform API calls made while enriching variable sets"""
+
+    def __init__(self, variable_set_ids: list[str], supports_workspace_name: bool = True):
+        self.supports_workspace_name = supports_workspace_name
+        self.failing_restores = Counter()
+        self.failing_runs = set()
+
+        self.deleted_workspace_ids = []
+        self.runs = {}
+        self.stopped_containers = []
+        self.workspaces = {}
+        self.variable_sets = {
+            variable_set_id: {
+                "attributes": {"name": variable_set_id, "global": False, "priority": False},
+                "relationships": {"workspaces": {"data": [{"id": "ws-prod", "type": "workspaces"}]}},
+            }
+            for variable_set_id in variable_set_ids
+        }
+        self.original_variable_sets = {key: benedict(value).clone() for key, value in self.variable_sets.items()}
+
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _get_attached_variable_set_ids(self, workspace_id: str) -> list[str]:
+        return [
+            variable_set_id
+            for variable_set_id, variable_set in self.variable_sets.items()
+            if {"id": workspace_id, "type": "workspaces"} in variable_set["relationships"]["workspaces"]["data"]
+        ]
+
+    def extract_data_from_api(  # noqa: PLR0911
+        self, path: str, method: str = "GET", request_data: dict | None = None, **kwargs  # noqa: ARG002
+    ) -> list[dict]:
+        with self._lock:
+            if method == "POST" and path.endswith("/workspaces"):
+                workspace_id = f"ws-tmp-{next(self._ids)}"
+                self.workspaces[workspace_id] = {
+                    "name": request_data["data"]["attributes"]["name"],
+                    "configured": False,
+                }
+                return [benedict({"id": workspace_id})]
+
+            if method == "GET" and path.startswith("/workspaces/"):
+                workspace = self.workspaces[path.split("/")[2]]
+                configuration_version = {"data": {"id": "cv-1"}} if workspace["configured"] else {"data": None}
+                return [benedict({"relationships": {"current-configuration-version": configuration_version}})]
+
+            if method == "DELETE" and path.startswith("/workspaces/"):
+                self.deleted_workspace_ids.append(path.split("/")[2])
+                return []
+
+            if method == "GET" and path.startswith("/varsets/"):
+                return [benedict(self.variable_sets[path.split("/")[2]]).clone()]
+
+            if method == "PATCH" and path.startswith("/varsets/"):
+                variable_set_id = path.split("/")[2]
+                attributes = request_data["data"]["attributes"]
+                is_restore = attributes["priority"] is not True
+                if is_restore and self.failing_restores[variable_set_id] > 0:
+                    self.failing_restores[variable_set_id] -= 1
+                    raise RuntimeError(f"Could not restore '{variable_set_id}'")
+
+                self.variable_sets[variable_set_id] = {
+                    "attributes": {**self.variable_sets[variable_set_id]["attributes"], **attributes},
+                    "relationships": {"workspaces": request_data["data"]["relationships"]["workspaces"]},
+                }
+                return []
+
+            if method == "POST" and path == "/runs":
+                workspace_id = request_data["data"]["relationships"]["workspace"]["data"]["id"]
+                attached_variable_set_ids = self._get_attached_variable_set_ids(workspace_id)
+                if set(attached_variable_set_ids) & self.failing_runs:
+                    return []
+
+                run_id = f"run-{next(self._ids)}"
+                self.runs[run_id] = (workspace_id, attached_variable_set_ids)
+                return [benedict({"id": run_id, "relationships": {"plan": {"data": {"id": f"plan-{run_id}"}}}})]
+
+            return []
+
+    def get_log_data_from_disk(self, id_: str, tempdir: str | None = None) -> str:  # noqa: ARG002
+        # Leave time for the other workers to pick a variable set
+        time.sleep(0.01)
+
+        _, variable_set_ids = self.runs[id_]
+        env_vars = "".join(f"KEY_{variable_set_id}=value-{variable_set_id}\0" for variable_set_id in variable_set_ids)
+
+        return f"{START_MARKER}{env_vars}{END_MARKER}"
+
+    def push(self, workspace_name: str, organization_name: str) -> None:  # noqa: ARG002
+        with self._lock:
+            pushed_workspace_name = workspace_name if self.supports_workspace_name else "SMK"
+            for workspace in self.workspaces.values():
+                if workspace["name"] == pushed_workspace_name:
+                    workspace["configured"] = True
+
+
+def build_data(variable_set_ids: list[str]) -> benedict:
+    return benedict(
+        {
+            "organizations": [{"id": "org-1", "attributes": {"name": "my-org"}}],
+            "variable_sets": [
+                {"id": variable_set_id, "relationships": {"organization": {"data": {"id": "org-1"}}}}
+                for variable_set_id in variable_set_ids
+            ],
+            "variable_set_variables": [
+                {
+                    "id": f"var-{variable_set_id}",
+                    "attributes": {"key": f"KEY_{variable_set_id}", "value": None},
+                    "relationships": {"varset": {"data": {"id": variable_set_id}}},
+                }
+                for variable_set_id in variable_set_ids
+            ],
+        }
+    )
+
+
+def build_exporter(monkeypatch: pytest.MonkeyPatch, api: FakeTerraformAPI, tmp_path: Path, workers: int):
+    exporter = TerraformExporter(
+        config=benedict(
+            {
+                "api_endpoint": "https://tfe.example.com",
+                "api_token": "token",
+                "experimental_support_variable_sets": True,
+                "parallel_enrichment_workers": workers,
+            }
+        )
+    )
+
+    monkeypatch.setattr("spacemk.exporters.terraform.click.confirm", lambda _: True)
+    monkeypatch.setattr("spacemk.exporters.terraform.is_command_available", lambda *_, **__: True)
+    monkeypatch.setattr("spacemk.exporters.terraform.tempfile.mkdtemp", lambda: str(tmp_path))
+
+    monkeypatch.setattr(exporter, "_create_agent_pool", lambda organization_id: "apool-1")  # noqa: ARG005
+    monkeypatch.setattr(exporter, "_delete_agent_pool", lambda id_: None)  # noqa: ARG005
+    monkeypatch.setattr(
+        exporter,
+        "_extract_projects_data",
+        lambda organization: [benedict({"id": "prj-1", "attributes": {"name": "Default Project"}})],  # noqa: ARG005
+    )
+    monkeypatch.setattr(exporter, "_extract_data_from_api", api.extract_data_from_api)
+    monkeypatch.setattr(exporter, "_get_log_data_from_disk", api.get_log_data_from_disk)
+    monkeypatch.setattr(exporter, "_get_plan", lambda id_: benedict({"attributes": {"log-read-url": id_}}))
+    monkeypatch.setattr(exporter, "_push_variable_set_enrichment_workspace", api.push)
+    monkeypatch.setattr(
+        exporter,
+        "_start_agent_container",
+        lambda agent_pool_id, container_name, worker_tempdir: (FakeContainer(container_name), container_name),  # noqa: ARG005
+    )
+    monkeypatch.setattr(exporter, "_stop_agent_container", api.stopped_containers.append)
+
+    return exporter
+
+
+def get_values(data: benedict) -> dict:
+    return {variable.get("id"): variable.get("attributes.value") for variable in data.get("variable_set_variables")}
+
+
+def test_variable_sets_are_enriched_in_parallel(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """It captures every variable set with its own temporary workspace, and restores their relationships."""
+    variable_set_ids = [f"vs-{i}" for i in range(6)]
+    api = FakeTerraformAPI(variable_set_ids)
+    exporter = build_exporter(monkeypatch, api, tmp_path, workers=3)
+
+    data = exporter._enrich_variable_set_data(build_data(variable_set_ids))  # noqa: SLF001
+
+    assert get_values(data) == {f"var-{id_}": f"value-{id_}" for id_ in variable_set_ids}
+    assert api.variable_sets == api.original_variable_sets
+    assert sorted(workspace["name"] for workspace in api.workspaces.values()) == ["SMK", "SMK-1", "SMK-2"]
+    assert sorted(api.deleted_workspace_ids) == sorted(api.workspaces)
+    assert len(api.stopped_containers) == 3  # noqa: PLR2004
+
+    # A temporary workspace is only used by one variable set at a time
+    assert all(len(variable_set_ids) == 1 for _, variable_set_ids in api.runs.values())
+
+
+def test_variable_sets_fall_back_to_one_workspace(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """It enriches variable sets one at a time if the push image does not support the WORKSPACE variable."""
+    variable_set_ids = [f"vs-{i}" for i in range(3)]
+    api = FakeTerraformAPI(variable_set_ids, supports_workspace_name=False)
+    exporter = build_exporter(monkeypatch, api, tmp_path, workers=3)
+
+    data = exporter._enrich_variable_set_data(build_data(variable_set_ids))  # noqa: SLF001
+
+    assert get_values(data) == {f"var-{id_}": f"value-{id_}" for id_ in variable_set_ids}
+    assert api.variable_sets == api.original_variable_sets
+    assert "Falling back to enriching variable sets one at a time" in caplog.text
+
+    smk_workspace_id = next(id_ for id_, workspace in api.workspaces.items() if workspace["name"] == "SMK")
+    assert {workspace_id for workspace_id, _ in api.runs.values()} == {smk_workspace_id}
+    assert sorted(api.deleted_workspace_ids) == sorted(api.workspaces)
+
+
+def test_variable_set_failures_are_reported(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """It reports variable sets that could not be enriched, once restored, as not enriched."""
+    caplog.set_level(logging.INFO)
+    api = FakeTerraformAPI(["vs-ok", "vs-failing"])
+    api.failing_runs.add("vs-failing")
+    exporter = build_exporter(monkeypatch, api, tmp_path, workers=2)
+
+    data = exporter._enrich_variable_set_data(build_data(["vs-ok", "vs-failing"]))  # noqa: SLF001
+
+    assert get_values(data) == {"var-vs-ok": "value-vs-ok", "var-vs-failing": None}
+    assert api.variable_sets == api.original_variable_sets
+    assert "'org-1/vs-ok' data enriched" in caplog.text
+    assert "'org-1/vs-failing' data not enriched" in caplog.text
+    assert "'org-1/vs-failing' data enriched" not in caplog.text
+
+
+def test_workspaces_are_retired_until_variable_sets_are_detached(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """It stops using a workspace that a variable set could not be detached from, and restores it at the end."""
+    variable_set_ids = ["vs-stuck", "vs-1", "vs-2", "vs-3"]
+    api = FakeTerraformAPI(variable_set_ids)
+    api.failing_runs.add("vs-stuck")
+    # The variable set can only be restored once the other ones have been processed
+    api.failing_restores["vs-stuck"] = 1
+    exporter = build_exporter(monkeypatch, api, tmp_path, workers=2)
+
+    data = exporter._enrich_variable_set_data(build_data(variable_set_ids))  # noqa: SLF001
+
+    # The other variable sets never ran with the stuck one attached to their workspace
+    assert len({workspace_id for workspace_id, _ in api.runs.values()}) == 1
+    assert all(len(variable_set_ids) == 1 for _, variable_set_ids in api.runs.values())
+    assert get_values(data) == {
+        "var-vs-stuck": None,
+        "var-vs-1": "value-vs-1",
+        "var-vs-2": "value-vs-2",
+        "var-vs-3": "value-vs-3",
+    }
+    assert api.variable_sets == api.original_variable_sets
+
+
+def test_variable_sets_fail_once_every_workspace_is_retired(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """It does not wait forever for a workspace once all of them have been retired."""
+    api = FakeTerraformAPI(["vs-stuck", "vs-1"])
+    api.failing_runs.add("vs-stuck")
+    api.failing_restores["vs-stuck"] = 1
+    exporter = build_exporter(monkeypatch, api, tmp_path, workers=1)
+
+    data = exporter._enrich_variable_set_data(build_data(["vs-stuck", "vs-1"]))  # noqa: SLF001
+
+    assert get_values(data) == {"var-vs-stuck": None, "var-vs-1": None}
+    assert api.runs == {}
+    assert api.variable_sets == api.original_variable_sets